@@ -2,13 +2,15 @@
 # =============================================================================
 
 # Standard
-from typing import Any, List, Tuple
+from functools import lru_cache
+from typing import Any, Iterator, List, Tuple
 
 # Third-party
 import numpy as np
-import pandas as pd
 from matplotlib import pyplot as plt
 from scipy.interpolate import interp1d
+from scipy.special import ndtri
+from scipy.stats import qmc
 
 #                                                          Authorship & Credits
 # =============================================================================
@@ -20,10 +22,550 @@ __status__ = "Stable"
 # =============================================================================
 
 
+@lru_cache(maxsize=32)
+def interpolation_operator(
+    num_control: int, num_steps: int, interpolation_method: str = "quadratic"
+) -> np.ndarray:
+    """linear map from the control values to the path values of the
+    interpolation on the fixed grids x_control = linspace(0, num_steps,
+    num_control) and x_increment = 0, 1, ..., num_steps. The interpolation
+    is linear in the control values, the operator is therefore the
+    interpolation of the identity matrix. It is computed once per
+    (num_control, num_steps, interpolation_method)
+
+    Parameters
+    ----------
+    num_control : int
+        control points number
+    num_steps : int
+        number of steps of abaqus simulation
+    interpolation_method : str, optional
+        interpolation method, by default "quadratic"
+
+    Returns
+    -------
+    np.ndarray
+        read-only operator (num_steps+1, num_control), the path is
+        operator @ y_control
+    """
+    x_control = np.linspace(0, num_steps, num_control, endpoint=True)
+    operator = AmplitudeGenerator.interpolation(
+        x_control=x_control,
+        y_control=np.eye(num_control),
+        num_steps=num_steps,
+        interpolation_method=interpolation_method,
+    )
+    operator.setflags(write=False)
+    return operator
+
+
+def _path_uniforms(
+    seed: int, start: int, num_paths: int, num_values: int
+) -> np.ndarray:
+    """uniform samples in [0, 1) of the paths start, ..., start+num_paths-1
+    of a seed, drawn with one call of a Generator on the counter-based
+    Philox stream of the seed. Every path owns a fixed block of the
+    stream, the generator jumps to the block of the first path. The values
+    of a path therefore do not depend on the batch it is drawn in
+
+    Parameters
+    ----------
+    seed : int
+        seed of the family of paths
+    start : int
+        index of the first path
+    num_paths : int
+        number of paths
+    num_values : int
+        number of samples per path
+
+    Returns
+    -------
+    np.ndarray
+        samples (num_paths, num_values)
+    """
+    # a step of the Philox counter yields 4 samples
+    stride = -(-int(num_values) // 4)
+    rng = np.random.Generator(np.random.Philox(np.random.SeedSequence(int(seed))))
+    rng.bit_generator.advance(int(start) * stride)
+    return rng.random((int(num_paths), 4 * stride))[:, : int(num_values)]
+
+
+def _uniform_control_values(
+    seed: int, start: int, num_paths: int, num_control: int, num_dim: int
+) -> np.ndarray:
+    """i.i.d. uniform control values in [-1, 1] of the paths start, ...,
+    start+num_paths-1 of a seed, the paths start at 0
+
+    Parameters
+    ----------
+    seed : int
+        seed of the family of paths
+    start : int
+        index of the first path
+    num_paths : int
+        number of paths
+    num_control : int
+        control points number
+    num_dim : int
+        number of dimension
+
+    Returns
+    -------
+    np.ndarray
+        control values (num_paths, num_control, num_dim)
+    """
+    unit = _path_uniforms(seed, start, num_paths, (num_control - 1) * num_dim)
+    y_control = np.zeros((int(num_paths), num_control, num_dim))
+    y_control[:, 1:, :] = (2 * unit - 1).reshape(
+        (int(num_paths), num_control - 1, num_dim)
+    )
+    return y_control
+
+
+@lru_cache(maxsize=256)
+def _amplitude_path(
+    seed: int,
+    index: int,
+    num_control: int,
+    num_steps: int,
+    num_dim: int,
+    interpolation_method: str,
+) -> np.ndarray:
+    """amplitude path of an index with i.i.d. uniform control values
+
+    Parameters
+    ----------
+    seed : int
+        seed of the family of paths
+    index : int
+        index of the path
+    num_control : int
+        control points number
+    num_steps : int
+        number of steps of abaqus simulation
+    num_dim : int
+        number of dimension
+    interpolation_method : str
+        interpolation method
+
+    Returns
+    -------
+    np.ndarray
+        read-only amplitude (num_steps+1, num_dim)
+    """
+    y_control = _uniform_control_values(seed, index, 1, num_control, num_dim)[0]
+    path = np.matmul(
+        interpolation_operator(num_control, num_steps, interpolation_method),
+        y_control,
+    )
+    path.setflags(write=False)
+    return path
+
+
+def _control_design(
+    sampler: "ControlPointSampler",
+    num_paths: int,
+    num_control: int,
+    num_dim: int,
+    seed: int,
+) -> np.ndarray:
+    """control values of the design of a family of paths, cached by the
+    options of the sampler instead of the sampler itself such that the
+    cache does not keep samplers alive
+
+    Parameters
+    ----------
+    sampler : ControlPointSampler
+        sampler of the control values
+    num_paths : int
+        number of paths of the design
+    num_control : int
+        control points number
+    num_dim : int
+        number of dimension
+    seed : int
+        seed of the design
+
+    Returns
+    -------
+    np.ndarray
+        read-only control values (num_paths, num_control, num_dim)
+    """
+    return _cached_control_design(
+        sampler._design_key(), num_paths, num_control, num_dim, seed
+    )
+
+
+@lru_cache(maxsize=4)
+def _cached_control_design(
+    design_key: tuple, num_paths: int, num_control: int, num_dim: int, seed: int
+) -> np.ndarray:
+    """control values of a design, cached per (sampler class and options,
+    num_paths, num_control, num_dim, seed)
+
+    Parameters
+    ----------
+    design_key : tuple
+        class of the sampler followed by its options
+    num_paths : int
+        number of paths of the design
+    num_control : int
+        control points number
+    num_dim : int
+        number of dimension
+    seed : int
+        seed of the design
+
+    Returns
+    -------
+    np.ndarray
+        read-only control values (num_paths, num_control, num_dim)
+    """
+    sampler_class, *options = design_key
+    design = sampler_class(*options).control_points(
+        num_paths, num_control, num_dim, seed
+    )
+    design.setflags(write=False)
+    return design
+
+
+@lru_cache(maxsize=32)
+def gp_cholesky(
+    kernel: str, length_scale: float, variance: float, num_steps: int
+) -> np.ndarray:
+    """Cholesky factor of the covariance of a zero-mean Gaussian process on
+    the steps 1, ..., num_steps, conditioned on a zero value at step 0 (the
+    paths start unloaded). The time is normalized to [0, 1]. It is computed
+    once per kernel and grid
+
+    Parameters
+    ----------
+    kernel : str
+        "squared_exponential", "matern52" or "matern32"
+    length_scale : float
+        length scale relative to the length of the path
+    variance : float
+        variance of the process
+    num_steps : int
+        number of steps of abaqus simulation
+
+    Returns
+    -------
+    np.ndarray
+        read-only lower triangular factor (num_steps, num_steps)
+    """
+    time = np.linspace(0, 1, num_steps + 1)
+    dis = np.abs(time[:, np.newaxis] - time[np.newaxis, :]) / length_scale
+    if kernel == "squared_exponential":
+        cov = variance * np.exp(-0.5 * dis**2)
+    elif kernel == "matern52":
+        cov = variance * (1 + np.sqrt(5) * dis + 5 / 3 * dis**2) * np.exp(
+            -np.sqrt(5) * dis
+        )
+    elif kernel == "matern32":
+        cov = variance * (1 + np.sqrt(3) * dis) * np.exp(-np.sqrt(3) * dis)
+    else:
+        raise ValueError(f"unknown kernel {kernel} \n")
+    # condition on the zero value at step 0
+    cov = cov[1:, 1:] - np.outer(cov[1:, 0], cov[0, 1:]) / cov[0, 0]
+    # jitter for the smooth kernels, whose covariance is nearly singular
+    cov[np.diag_indices(num_steps)] += 1e-8 * variance
+    factor = np.linalg.cholesky(cov)
+    factor.setflags(write=False)
+    return factor
+
+
+class PathSampler:
+    """base class of the samplers of amplitude paths"""
+
+    def sample(
+        self, amplitude: "AmplitudeGenerator", start: int, num_paths: int
+    ) -> np.ndarray:
+        """sample the paths start, ..., start+num_paths-1 of the family of
+        `amplitude` in one call, path i of a batch equals `path` of index
+        start+i
+
+        Parameters
+        ----------
+        amplitude : AmplitudeGenerator
+            amplitude generator, provides the seed, the grids and the
+            dimension
+        start : int
+            index of the first path
+        num_paths : int
+            number of paths
+
+        Returns
+        -------
+        np.ndarray
+            amplitude paths (num_paths, num_steps+1, num_dim)
+
+        Raises
+        ------
+        NotImplementedError
+            error report
+        """
+        raise NotImplementedError("Should be implemented in sub-class \n")
+
+    def path(
+        self, amplitude: "AmplitudeGenerator", index: int, cache: bool = True
+    ) -> np.ndarray:
+        """path of an index of the family of `amplitude`, by default the
+        batch of this single index
+
+        Parameters
+        ----------
+        amplitude : AmplitudeGenerator
+            amplitude generator, provides the seed and the grids
+        index : int
+            index of the path
+        cache : bool, optional
+            allow caching of the path, by default True
+
+        Returns
+        -------
+        np.ndarray
+            read-only amplitude (num_steps+1, num_dim)
+        """
+        path = self.sample(amplitude, int(index), 1)[0]
+        path.setflags(write=False)
+        return path
+
+
+class ControlPointSampler(PathSampler):
+    """samplers of the control values, the paths are interpolated with the
+    cached interpolation operator"""
+
+    def control_points(
+        self, num_paths: int, num_control: int, num_dim: int, seed: Any
+    ) -> np.ndarray:
+        """sample the control values of a batch of paths, the paths start
+        at 0 and the other control values are in [-1, 1]
+
+        Parameters
+        ----------
+        num_paths : int
+            number of paths
+        num_control : int
+            control points number
+        num_dim : int
+            number of dimension
+        seed : Any
+            seed of the batch
+
+        Returns
+        -------
+        np.ndarray
+            control values (num_paths, num_control, num_dim)
+        """
+        unit = self.unit_samples(num_paths, (num_control - 1) * num_dim, seed)
+        y_control = np.zeros((num_paths, num_control, num_dim))
+        y_control[:, 1:, :] = (2 * unit - 1).reshape(
+            (num_paths, num_control - 1, num_dim)
+        )
+        return y_control
+
+    def unit_samples(self, num_paths: int, num_var: int, seed: Any) -> np.ndarray:
+        """samples in the unit hypercube
+
+        Parameters
+        ----------
+        num_paths : int
+            number of samples
+        num_var : int
+            dimension of the hypercube
+        seed : Any
+            seed of the samples
+
+        Returns
+        -------
+        np.ndarray
+            samples (num_paths, num_var)
+
+        Raises
+        ------
+        NotImplementedError
+            error report
+        """
+        raise NotImplementedError("Should be implemented in sub-class \n")
+
+    def control_values(
+        self, amplitude: "AmplitudeGenerator", start: int, num_paths: int
+    ) -> np.ndarray:
+        """control values of the paths start, ..., start+num_paths-1 of the
+        family of `amplitude`, the control values of all num_amplitude
+        paths form one design that is sampled once
+
+        Parameters
+        ----------
+        amplitude : AmplitudeGenerator
+            amplitude generator
+        start : int
+            index of the first path
+        num_paths : int
+            number of paths
+
+        Returns
+        -------
+        np.ndarray
+            control values (num_paths, num_control, num_dim)
+        """
+        return _control_design(
+            self, int(amplitude.num_amplitude), int(amplitude.num_control),
+            int(amplitude.num_dim), int(amplitude.seed),
+        )[int(start): int(start) + int(num_paths)]
+
+    def _design_key(self) -> tuple:
+        """hashable options of the sampler that determine its designs
+
+        Returns
+        -------
+        tuple
+            class and options of the sampler
+        """
+        return (type(self),)
+
+    def sample(
+        self, amplitude: "AmplitudeGenerator", start: int, num_paths: int
+    ) -> np.ndarray:
+        return amplitude.interpolate(
+            self.control_values(amplitude, start, num_paths)
+        )
+
+
+class UniformSampler(ControlPointSampler):
+    """i.i.d. uniform control values. The control values of a batch are
+    drawn at once from the Philox stream of the seed, the control values of an index do
+    not depend on the batch"""
+
+    def control_values(
+        self, amplitude: "AmplitudeGenerator", start: int, num_paths: int
+    ) -> np.ndarray:
+        return _uniform_control_values(
+            int(amplitude.seed), int(start), int(num_paths),
+            int(amplitude.num_control), int(amplitude.num_dim),
+        )
+
+    def path(
+        self, amplitude: "AmplitudeGenerator", index: int, cache: bool = True
+    ) -> np.ndarray:
+        key = amplitude._path_key(index)
+        if cache:
+            return _amplitude_path(*key)
+        return _amplitude_path.__wrapped__(*key)
+
+
+class SobolSampler(ControlPointSampler):
+    """scrambled Sobol' control values, the paths of a batch cover the
+    space of the control values more evenly than i.i.d. samples. Batches
+    of a power of 2 keep the balance properties of the sequence"""
+
+    def __init__(self, scramble: bool = True) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        scramble : bool, optional
+            randomize the sequence with the seed, by default True
+        """
+        self.scramble = scramble
+
+    def _design_key(self) -> tuple:
+        return (type(self), bool(self.scramble))
+
+    def unit_samples(self, num_paths: int, num_var: int, seed: Any) -> np.ndarray:
+        return qmc.Sobol(d=num_var, scramble=self.scramble, seed=seed).random(
+            num_paths
+        )
+
+
+class LatinHypercubeSampler(ControlPointSampler):
+    """Latin hypercube control values, every control value is stratified
+    over the paths of a batch"""
+
+    def __init__(self, scramble: bool = True) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        scramble : bool, optional
+            random location of the samples in their strata, the centers of
+            the strata otherwise, by default True
+        """
+        self.scramble = scramble
+
+    def _design_key(self) -> tuple:
+        return (type(self), bool(self.scramble))
+
+    def unit_samples(self, num_paths: int, num_var: int, seed: Any) -> np.ndarray:
+        return qmc.LatinHypercube(
+            d=num_var, scramble=self.scramble, seed=seed
+        ).random(num_paths)
+
+
+class GaussianProcessSampler(PathSampler):
+    """paths sampled from a zero-mean Gaussian process on the steps of the
+    simulation, starting at 0. The smoothness is set by the kernel and the
+    length scale instead of the control points, the Cholesky factor of the
+    covariance is cached per kernel and grid"""
+
+    def __init__(
+        self,
+        kernel: str = "squared_exponential",
+        length_scale: float = 0.2,
+        variance: float = 1 / 3,
+    ) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        kernel : str, optional
+            "squared_exponential", "matern52" or "matern32", by default
+            "squared_exponential"
+        length_scale : float, optional
+            length scale relative to the length of the path, by default 0.2
+        variance : float, optional
+            variance of the process, by default 1/3 (the variance of the
+            uniform control values)
+        """
+        self.kernel = kernel
+        self.length_scale = length_scale
+        self.variance = variance
+
+    def sample(
+        self, amplitude: "AmplitudeGenerator", start: int, num_paths: int
+    ) -> np.ndarray:
+        num_steps = int(amplitude.num_steps)
+        factor = gp_cholesky(
+            self.kernel, float(self.length_scale), float(self.variance),
+            num_steps,
+        )
+        # standard normal noise by inversion of the uniform samples, such
+        # that every path consumes a fixed block of the stream
+        unit = _path_uniforms(
+            int(amplitude.seed), int(start), int(num_paths),
+            num_steps * int(amplitude.num_dim),
+        )
+        noise = ndtri(np.maximum(unit, 2.0**-54)).reshape(
+            (int(num_paths), num_steps, int(amplitude.num_dim))
+        )
+        paths = np.zeros((int(num_paths), num_steps + 1, int(amplitude.num_dim)))
+        paths[:, 1:, :] = np.matmul(factor, noise)
+        return paths
+
+
 class AmplitudeGenerator:
 
     """amplitude generator"""
 
+    samplers = {
+        "uniform": UniformSampler,
+        "sobol": SobolSampler,
+        "lhs": LatinHypercubeSampler,
+        "gp": GaussianProcessSampler,
+    }
+
     def __init__(self,
                  num_control: int = 8,
                  num_steps: int = 100,
@@ -31,8 +573,21 @@ class AmplitudeGenerator:
                  arg_name: str = "amplitude",
                  interpolation_method: str = "quadratic",
                  num_dim: int = 3,
-                 seed: Any = None,) -> None:
-        """Initialization"""
+                 seed: Any = None,
+                 sampler: str = "uniform",
+                 sampler_options: dict = None,) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        sampler : str, optional
+            sampler of the paths, one of `samplers`: i.i.d. uniform control
+            values ("uniform"), scrambled Sobol' ("sobol") or Latin
+            hypercube ("lhs") control values, or a Gaussian process ("gp"),
+            by default "uniform"
+        sampler_options : dict, optional
+            keyword arguments of the sampler, by default None
+        """
         self.num_amplitude = num_amplitude
         self.num_control = num_control
         self.num_steps = num_steps
@@ -48,69 +603,100 @@ class AmplitudeGenerator:
         # assert dimension
         assert num_dim == 3 or num_dim == 6, "dimension should be 3 or 6"
 
-    def get_amplitude(self) -> List:
-        """get amplitude curves
+        if sampler not in self.samplers:
+            raise ValueError(
+                f"sampler should be one of {list(self.samplers)}, "
+                f"got {sampler}")
+        self.sampler = self.samplers[sampler](**(sampler_options or {}))
+
+    def get_amplitude(self, index: int = 0) -> List:
+        """get the amplitude curve for abaqus, only the requested path is
+        computed
 
         Parameters
         ----------
-        num_amplitude : int
-            number of amplitude, usually 3 or 6
-        num_control : int
-            control points number
-        num_steps : int
-            num steps of abaqus simulation
-        arg_name : str, optional
-            name of amplitude, by default "amplitude"
-        interpolation_method : str, optional
-            interpolation method, by default "quadratic"
-        seed : any, optional
-            seed , by default None
+        index : int, optional
+            index of the path, by default 0
 
         Returns
         -------
-        pd.DataFrame
-            _description_
+        List
+            amplitude (num_dim lists of num_steps+1 values)
         """
-        # self.arg_name = arg_name
-        # self.num_steps = num_steps
-        # create df dataframe for amplitude
-        amplitude_temp = np.empty([self.num_amplitude, 3])
-        amplitude_temp[:] = np.nan
-        self.amplitude = pd.DataFrame(
-            amplitude_temp, columns=["x_control", "y_control", self.arg_name]
-        ).astype(object)
-        # create pandas frame for output
-        amplitude_to_abaqus = np.empty([self.num_amplitude, 1])
-        self.amplitude_to_abaqus = pd.DataFrame(
-            amplitude_to_abaqus, columns=[self.arg_name]
-        ).astype(object)
-
-        # a loop to generate loads path
-        for ii in range(self.num_amplitude):
-            # generate control points
-            x_control, y_control = self.generate_control_points(
-                seed=self.seed + ii,
-                num_control=self.num_control,
-                num_steps=self.num_steps,
-                num_dim=self.num_dim,
-            )
-            self.amplitude.at[ii, "x_control"] = x_control
-            self.amplitude.at[ii, "y_control"] = y_control
-            # save for plot figure
-            self.amplitude.at[ii, self.arg_name] = self.interpolation(
-                x_control=x_control,
-                y_control=y_control,
-                num_steps=self.num_steps,
-                interpolation_method=self.interpolation_method,
+        return self.amplitude_path(index).T.tolist()
+
+    def amplitude_path(self, index: int) -> np.ndarray:
+        """amplitude path of an index, equal to the path of the index in
+        any batch of `generate_paths`. With the uniform sampler recently
+        used paths are kept in a bounded LRU cache
+
+        Parameters
+        ----------
+        index : int
+            index of the path, 0 <= index < num_amplitude
+
+        Returns
+        -------
+        np.ndarray
+            read-only amplitude (num_steps+1, num_dim)
+
+        Raises
+        ------
+        IndexError
+            if the index is out of range
+        """
+        if not 0 <= index < self.num_amplitude:
+            raise IndexError(
+                f"amplitude index {index} out of range for "
+                f"{self.num_amplitude} amplitudes \n"
             )
+        return self.sampler.path(self, index)
 
-            # save for abaqus simulation
-            self.amplitude_to_abaqus.at[ii, self.arg_name] = self.amplitude.at[
-                ii, self.arg_name
-            ].T.tolist()
+    def iter_amplitudes(self, start: int = 0, stop: int = None) -> Iterator[np.ndarray]:
+        """stream the amplitude paths one by one, the paths are not cached
+        such that the memory does not scale with the number of paths (the
+        Sobol' and Latin hypercube samplers keep the control values of
+        their design)
+
+        Parameters
+        ----------
+        start : int, optional
+            index of the first path, by default 0
+        stop : int, optional
+            index after the last path, by default num_amplitude
+
+        Yields
+        ------
+        np.ndarray
+            amplitude (num_steps+1, num_dim)
+        """
+        if stop is None:
+            stop = self.num_amplitude
+        for ii in range(start, min(stop, self.num_amplitude)):
+            yield self.sampler.path(self, ii, cache=False)
 
-        # Return the 0th index of the dataframe
-        return self.amplitude_to_abaqus.iloc[0]['amplitude']
+    def _path_key(self, index: int) -> tuple:
+        """arguments that determine the path of an index
+
+        Parameters
+        ----------
+        index : int
+            index of the path
+
+        Returns
+        -------
+        tuple
+            seed, index, num_control, num_steps, num_dim and interpolation
+            method
+        """
+        return (
+            int(self.seed),
+            int(index),
+            int(self.num_control),
+            int(self.num_steps),
+            int(self.num_dim),
+            self.interpolation_method,
+        )
 
     @staticmethod
     def generate_control_points(
@@ -139,18 +725,74 @@ class AmplitudeGenerator:
         """
         num_control = int(num_control)
         num_increment = int(num_steps)
-        np.random.seed(seed)
+        # a local stream with the same values as np.random.seed(seed)
+        rng = np.random.RandomState(seed)
 
         x_control = np.linspace(0, num_increment, num_control, endpoint=True)
         y_control = np.zeros((1, num_dim))
         y_control = np.vstack(
             (
                 y_control,
-                np.random.uniform(-1, 1, (num_control - 1, num_dim)),
+                rng.uniform(-1, 1, (num_control - 1, num_dim)),
             )
         )
         return x_control, y_control
 
+    def generate_paths(self, num_paths: int = None, start: int = 0) -> np.ndarray:
+        """generate a batch of amplitude paths in one call with the sampler,
+        all paths are interpolated (or sampled) at once. Path i of the batch
+        equals `amplitude_path(start + i)`. The paths are not stored on the
+        instance
+
+        Parameters
+        ----------
+        num_paths : int, optional
+            number of paths, by default the paths from start to
+            num_amplitude
+        start : int, optional
+            index of the first path, by default 0
+
+        Returns
+        -------
+        np.ndarray
+            amplitude paths (num_paths, num_steps+1, num_dim)
+
+        Raises
+        ------
+        IndexError
+            if the paths are out of range
+        """
+        if num_paths is None:
+            num_paths = self.num_amplitude - start
+        if start < 0 or num_paths < 0 or start + num_paths > self.num_amplitude:
+            raise IndexError(
+                f"amplitude paths {start} to {start + num_paths} out of range "
+                f"for {self.num_amplitude} amplitudes \n"
+            )
+
+        return self.sampler.sample(self, start, num_paths)
+
+    def interpolate(self, y_control: np.ndarray) -> np.ndarray:
+        """interpolate control values on the fixed control grid with the
+        cached interpolation operator, a single matrix multiply
+
+        Parameters
+        ----------
+        y_control : np.ndarray
+            y location of control points (num_control, num_dim), or a batch
+            of control points (num_paths, num_control, num_dim)
+
+        Returns
+        -------
+        np.ndarray
+            amplitude (num_steps+1, num_dim), or (num_paths, num_steps+1,
+            num_dim) for a batch
+        """
+        operator = interpolation_operator(
+            int(self.num_control), int(self.num_steps), self.interpolation_method
+        )
+        return np.matmul(operator, y_control)
+
     @staticmethod
     def interpolation(
         x_control: np.ndarray,
@@ -158,14 +800,16 @@ class AmplitudeGenerator:
         num_steps: int,
         interpolation_method: str = "quadratic",
     ) -> np.ndarray:
-        """do interpolation
+        """do interpolation, all dimensions (and paths) are fitted with one
+        spline
 
         Parameters
         ----------
         x_control : np.ndarray
             x location of control points
         y_control : np.ndarray
-            y location of control points
+            y location of control points (num_control, num_dim), or a batch
+            of control points (num_paths, num_control, num_dim)
         num_steps : int
             number of steps of abaqus simulation
         interpolation_method : str, optional
@@ -174,26 +818,17 @@ class AmplitudeGenerator:
         Returns
         -------
         np.ndarray
-            amplitude
+            amplitude (num_steps+1, num_dim), or (num_paths, num_steps+1,
+            num_dim) for a batch
         """
-        num_dim = y_control.shape[1]
         num_steps = int(num_steps)
-        path = np.zeros((num_steps + 1, num_dim))
-        for ii in range(num_dim):
-            fit = interp1d(
-                x_control, y_control[:, ii], kind=interpolation_method
-            )
-            # x_increment points
-            num_increment = np.linspace(
-                0, num_steps, num_steps + 1, endpoint=True
-            )
-            # get the path
-            path[:, ii] = fit(num_increment)
-
-            # clear the fit
-            del fit
+        fit = interp1d(
+            x_control, y_control, kind=interpolation_method, axis=-2
+        )
+        # x_increment points
+        num_increment = np.linspace(0, num_steps, num_steps + 1, endpoint=True)
 
-        return path
+        return fit(num_increment)
 
     def plot_amplitude(
         self,
@@ -218,10 +853,15 @@ class AmplitudeGenerator:
                 "iteration" in kwargs.keys()
             ), " iteration should be provided"
             iteration = kwargs["iteration"]
-            x_control = self.amplitude.at[iteration, "x_control"]
-            y_control = self.amplitude.at[iteration, "y_control"]
-            amplitude = self.amplitude.at[iteration, self.arg_name]
+            amplitude = self.amplitude_path(iteration)
             num_steps = self.num_steps
+            if isinstance(self.sampler, ControlPointSampler):
+                x_control = np.linspace(0, int(num_steps), self.num_control)
+                y_control = self.sampler.control_values(self, iteration, 1)[0]
+            else:
+                # the paths of the Gaussian process have no control points
+                x_control = np.arange(int(num_steps) + 1)
+                y_control = amplitude
         else:
             assert (
                 "x_control" in kwargs.keys()
@@ -0,0 +1,119 @@
+"""
+Parallel generation of many microstructures with independent random streams.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# standard
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple, Type
+
+# Third party
+import numpy as np
+
+# import local functions
+from .circle_particles import CircleParticles
+from .microstructure_generator import MicrostructureGenerator
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+
+def _generate_one(
+    args: Tuple[Type[MicrostructureGenerator], dict, np.random.SeedSequence]
+) -> Tuple[np.ndarray, float, float]:
+    """generate a single microstructure, executed by the workers
+
+    Parameters
+    ----------
+    args : Tuple[Type[MicrostructureGenerator], dict, np.random.SeedSequence]
+        generator class, its parameters and the seed of the random stream
+
+    Returns
+    -------
+    Tuple[np.ndarray, float, float]
+        fiber positions, reached volume fraction and time usage
+    """
+    generator_class, params, seed = args
+    generator = generator_class(**params)
+    generator.generate_microstructure(seed=seed)
+    return generator.fiber_positions, generator.vol_frac, generator.time_usage
+
+
+def generate_many(
+    params_list: List[dict],
+    n_workers: int = 1,
+    seed: Any = None,
+    generator: Type[MicrostructureGenerator] = CircleParticles,
+    chunksize: int = 1,
+) -> Dict[str, np.ndarray]:
+    """generate a batch of microstructures in a process pool
+
+    Every microstructure gets its own random stream spawned from one
+    `np.random.SeedSequence`, the stream of the ii-th microstructure only
+    depends on `seed` and ii. The results are therefore reproducible and
+    independent of the number of workers.
+
+    Parameters
+    ----------
+    params_list : List[dict]
+        keyword arguments of the generator, one dict per microstructure
+    n_workers : int, optional
+        number of worker processes, the microstructures are generated in
+        the calling process if 1, by default 1
+    seed : Any, optional
+        entropy of the root seed sequence, by default None
+    generator : Type[MicrostructureGenerator], optional
+        generator class, by default CircleParticles
+    chunksize : int, optional
+        number of microstructures sent to a worker at once, by default 1
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        stacked results, the fiber positions of microstructure ii are
+        fiber_positions[offsets[ii]:offsets[ii + 1]]
+
+        - offsets: (n + 1,) start row of every microstructure
+        - fiber_positions: concatenated fiber positions of all
+          microstructures, one row per partition
+        - vol_frac: (n,) reached volume fractions
+        - time_usage: (n,) generation time of every microstructure
+        - seed: entropy of the root seed sequence
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+    tasks = [
+        (generator, params, child)
+        for params, child in zip(
+            params_list, seed_sequence.spawn(len(params_list))
+        )
+    ]
+    if n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_generate_one, tasks, chunksize=chunksize))
+    else:
+        results = [_generate_one(task) for task in tasks]
+
+    num_rows = [positions.shape[0] for positions, _, _ in results]
+    offsets = np.zeros(len(results) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(num_rows)
+    if results:
+        fiber_positions = np.concatenate(
+            [positions for positions, _, _ in results], axis=0
+        )
+    else:
+        fiber_positions = np.zeros((0, 0))
+
+    return {
+        "offsets": offsets,
+        "fiber_positions": fiber_positions,
+        "vol_frac": np.array([vol_frac for _, vol_frac, _ in results]),
+        "time_usage": np.array([time_usage for _, _, time_usage in results]),
+        "seed": seed_sequence.entropy,
+    }
@@ -0,0 +1,339 @@
+"""
+Statistical descriptors of periodic particle microstructures.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# standard
+from typing import Dict, Sequence
+
+# Third party
+import numpy as np
+
+# import local functions
+from .fiber_store import merge_partitions
+from .neighbour_search import cKDTree, minimum_image, periodic_k_nearest
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+
+def two_point_correlation(phase_map: np.ndarray) -> np.ndarray:
+    """periodic two-point correlation of the particle phase, computed with
+    the FFT. S2[i, j, (k)] is the probability that two points separated by
+    the grid offset (i, j, (k)) are both in the particle phase, S2[0, ...]
+    equals the volume fraction
+
+    Parameters
+    ----------
+    phase_map : np.ndarray
+        phase map (1: particle, 0: matrix) or phase fractions of a single
+        RVE, all axes are correlated. Use `batch_descriptors` to correlate
+        a stack of maps map by map
+
+    Returns
+    -------
+    np.ndarray
+        two-point correlation with the same shape as the grid, the zero
+        offset is at index 0 (use np.fft.fftshift to center it)
+    """
+    phase_map = np.asarray(phase_map, dtype=float)
+    return _two_point_correlation(phase_map, axes=tuple(range(phase_map.ndim)))
+
+
+def _two_point_correlation(phase_map: np.ndarray, axes: tuple) -> np.ndarray:
+    """two-point correlation over the given axes
+
+    Parameters
+    ----------
+    phase_map : np.ndarray
+        phase map(s)
+    axes : tuple
+        axes of the grid
+
+    Returns
+    -------
+    np.ndarray
+        two-point correlation
+    """
+    shape = [phase_map.shape[axis] for axis in axes]
+    spectrum = np.fft.rfftn(phase_map, axes=axes)
+    return np.fft.irfftn(np.abs(spectrum) ** 2, s=shape, axes=axes) / np.prod(
+        shape
+    )
+
+
+def nearest_neighbour_distances(centers: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """distance of every particle center to the closest other center, with
+    the minimum image convention of the periodic RVE
+
+    Parameters
+    ----------
+    centers : np.ndarray
+        particle centers, one row per particle
+    box : np.ndarray
+        size of the RVE along every axis
+
+    Returns
+    -------
+    np.ndarray
+        nearest neighbour distance of every particle (inf for a single
+        particle)
+    """
+    centers = np.asarray(centers, dtype=float)
+    box = np.asarray(box, dtype=float)
+    dis, _ = periodic_k_nearest(points=centers, box=box, k=1)
+    if dis is not None:
+        return dis[:, 0]
+    return _row_pair_statistics(centers, box, radii=np.zeros(0))[0]
+
+
+def ripley_k(centers: np.ndarray, box: np.ndarray, radii: np.ndarray) -> np.ndarray:
+    """Ripley's K function of the particle centers in the periodic RVE,
+    K(r) = V / (n (n - 1)) * number of ordered pairs closer than r. No edge
+    correction is needed with the minimum image convention, K(r) equals the
+    volume of a ball (pi r^2 in 2D) for complete spatial randomness
+
+    Parameters
+    ----------
+    centers : np.ndarray
+        particle centers, one row per particle
+    box : np.ndarray
+        size of the RVE along every axis, the radii should be smaller than
+        half of the smallest size
+    radii : np.ndarray
+        radii at which K is evaluated, in any order
+
+    Returns
+    -------
+    np.ndarray
+        K at every radius, in the order of `radii`
+    """
+    centers = np.asarray(centers, dtype=float)
+    box = np.asarray(box, dtype=float)
+    radii = np.asarray(radii, dtype=float)
+    num = centers.shape[0]
+    if num < 2:
+        return np.zeros(radii.shape[0])
+    if cKDTree is None:
+        return _row_pair_statistics(centers, box, radii)[1]
+    points = np.mod(centers, box)
+    points = np.where(points >= box, points - box, points)
+    tree = cKDTree(points, boxsize=box)
+    # the pairs closer than r, counted with np.nextafter to exclude the
+    # pairs at exactly r as the vectorized path does, minus the self pairs
+    counts = tree.count_neighbors(tree, np.nextafter(radii, 0)) - num
+    return np.prod(box) * counts / (num * (num - 1))
+
+
+def _pair_statistics(
+    positions: np.ndarray, valid: np.ndarray, box: np.ndarray, radii: np.ndarray
+) -> tuple:
+    """nearest neighbour distances and Ripley's K of a stack of packings
+    from all minimum image pair distances
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        centers of the packings (num_packings, num_particles, dim), padded
+        to the largest packing
+    valid : np.ndarray
+        mask of the particles that are not padding (num_packings,
+        num_particles)
+    box : np.ndarray
+        size of the RVE along every axis
+    radii : np.ndarray
+        radii at which K is evaluated, in any order
+
+    Returns
+    -------
+    tuple
+        nearest neighbour distances (num_packings, num_particles), inf for
+        padding, and K (num_packings, num_radii) in the order of `radii`
+    """
+    num_packings, num_particles, _ = positions.shape
+    delta = minimum_image(
+        positions[:, :, np.newaxis, :] - positions[:, np.newaxis, :, :], box
+    )
+    dis = np.linalg.norm(delta, axis=3)
+    pair = valid[:, :, np.newaxis] & valid[:, np.newaxis, :]
+    pair[:, np.arange(num_particles), np.arange(num_particles)] = False
+    dis[~pair] = np.inf
+    nn_dis = dis.min(axis=2)
+
+    # number of pairs per radius bin, accumulated over the radii. The bins
+    # need ascending radii, K is returned in the order of the given radii
+    order = np.argsort(radii, kind="stable")
+    bins = np.searchsorted(radii[order], dis[pair], side="right")
+    packing = np.broadcast_to(
+        np.arange(num_packings)[:, np.newaxis, np.newaxis], dis.shape
+    )[pair]
+    counts = np.bincount(
+        packing * (radii.shape[0] + 1) + bins,
+        minlength=num_packings * (radii.shape[0] + 1),
+    ).reshape((num_packings, radii.shape[0] + 1))
+    counts = np.cumsum(counts[:, :-1], axis=1)[:, np.argsort(order)]
+    num = valid.sum(axis=1)
+    norm = np.where(num > 1, num * (num - 1), 1)
+    k_values = np.prod(box) * counts / norm[:, np.newaxis]
+    k_values[num < 2] = 0.0
+
+    return nn_dis, k_values
+
+
+def _row_pair_statistics(
+    centers: np.ndarray, box: np.ndarray, radii: np.ndarray,
+    chunk_size: int = 2**22,
+) -> tuple:
+    """nearest neighbour distances and Ripley's K of a single packing from
+    the minimum image pair distances, computed for blocks of rows such
+    that at most `chunk_size` pair distances are held at once
+
+    Parameters
+    ----------
+    centers : np.ndarray
+        particle centers, one row per particle
+    box : np.ndarray
+        size of the RVE along every axis
+    radii : np.ndarray
+        radii at which K is evaluated, in any order
+    chunk_size : int, optional
+        maximum number of pair distances evaluated at once, by default 2**22
+
+    Returns
+    -------
+    tuple
+        nearest neighbour distances (num_particles,), inf for a single
+        particle, and K (num_radii,) in the order of `radii`
+    """
+    num = centers.shape[0]
+    order = np.argsort(radii, kind="stable")
+    nn_dis = np.full(num, np.inf)
+    counts = np.zeros(radii.shape[0] + 1, dtype=np.int64)
+    num_rows = max(1, chunk_size // max(num, 1))
+    for first in range(0, num, num_rows):
+        rows = np.arange(first, min(first + num_rows, num))
+        dis = np.linalg.norm(
+            minimum_image(centers[rows, np.newaxis, :] - centers[np.newaxis], box),
+            axis=2,
+        )
+        dis[np.arange(rows.shape[0]), rows] = np.inf
+        nn_dis[rows] = dis.min(axis=1, initial=np.inf)
+        counts += np.bincount(
+            np.searchsorted(radii[order], dis[np.isfinite(dis)], side="right"),
+            minlength=radii.shape[0] + 1,
+        )
+    if num < 2:
+        return nn_dis, np.zeros(radii.shape[0])
+    k_values = np.prod(box) * np.cumsum(counts[:-1]) / (num * (num - 1))
+
+    return nn_dis, k_values[np.argsort(order)]
+
+
+def batch_descriptors(
+    packings: Sequence[np.ndarray],
+    box: np.ndarray,
+    radii: np.ndarray,
+    bins: np.ndarray,
+    phase_maps: np.ndarray = None,
+    chunk_size: int = 2**22,
+) -> Dict[str, np.ndarray]:
+    """descriptors of many packings of the same RVE at once. The packings
+    with at most `chunk_size` pair distances are padded to the largest of
+    them and processed in chunks of at most `chunk_size` pair distances.
+    Larger packings are processed one by one with the periodic kd-tree
+    (or in blocks of rows of at most `chunk_size` pair distances if SciPy
+    is not available). The phase maps are correlated with one batched FFT
+
+    The packings of `generate_many` are obtained with
+    ``np.split(result["fiber_positions"], result["offsets"][1:-1])``.
+
+    Parameters
+    ----------
+    packings : Sequence[np.ndarray]
+        fibers of every packing, either `fiber_positions` (one row per
+        partition [x, y, (z), r, p]) or one row per fiber [x, y, (z), r]
+    box : np.ndarray
+        size of the RVE along every axis
+    radii : np.ndarray
+        radii at which Ripley's K is evaluated, in any order
+    bins : np.ndarray
+        bin edges of the nearest neighbour distance distribution
+    phase_maps : np.ndarray, optional
+        stack of phase maps (num_packings, *grid), by default None
+    chunk_size : int, optional
+        maximum number of pair distances evaluated at once, by default 2**22
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        - num_fibers: (n,) number of fibers of every packing
+        - nn_mean: (n,) mean nearest neighbour distance
+        - nn_distribution: (n, len(bins) - 1) probability density of the
+          nearest neighbour distance
+        - ripley_k: (n, len(radii)) Ripley's K, in the order of `radii`
+        - two_point_correlation: (n, *grid), only if phase_maps is given
+    """
+    box = np.asarray(box, dtype=float)
+    radii = np.asarray(radii, dtype=float)
+    bins = np.asarray(bins, dtype=float)
+    dim = box.shape[0]
+    centers = []
+    for fibers in packings:
+        fibers = np.asarray(fibers, dtype=float).reshape((-1, np.shape(fibers)[-1]))
+        if fibers.shape[1] == dim + 2:
+            fibers = merge_partitions(fibers, box)
+        centers.append(fibers[:, 0:dim])
+    num_fibers = np.array([center.shape[0] for center in centers], dtype=int)
+    large = num_fibers.astype(np.int64) ** 2 > chunk_size
+    small = np.flatnonzero(~large)
+    num_max = max(int(num_fibers[small].max(initial=0)), 1)
+
+    nn_mean = np.zeros(len(centers))
+    nn_distribution = np.zeros((len(centers), bins.shape[0] - 1))
+    k_values = np.zeros((len(centers), radii.shape[0]))
+    nn_dis = {}
+    num_chunk = max(1, chunk_size // num_max**2)
+    for first in range(0, small.shape[0], num_chunk):
+        chunk = small[first: first + num_chunk]
+        positions = np.zeros((chunk.shape[0], num_max, dim))
+        valid = np.zeros((chunk.shape[0], num_max), dtype=bool)
+        for ii, packing in enumerate(chunk):
+            positions[ii, : num_fibers[packing]] = centers[packing]
+            valid[ii, : num_fibers[packing]] = True
+        chunk_dis, k_values[chunk] = _pair_statistics(positions, valid, box, radii)
+        nn_dis.update(zip(chunk.tolist(), chunk_dis))
+    for packing in np.flatnonzero(large).tolist():
+        if cKDTree is not None:
+            nn_dis[packing] = nearest_neighbour_distances(centers[packing], box)
+            k_values[packing] = ripley_k(centers[packing], box, radii)
+        else:
+            nn_dis[packing], k_values[packing] = _row_pair_statistics(
+                centers[packing], box, radii, chunk_size
+            )
+    for packing, dis in nn_dis.items():
+        dis = dis[np.isfinite(dis)]
+        if dis.shape[0] == 0:
+            continue
+        nn_mean[packing] = dis.mean()
+        nn_distribution[packing], _ = np.histogram(dis, bins=bins, density=True)
+
+    descriptors = {
+        "num_fibers": num_fibers,
+        "nn_mean": nn_mean,
+        "nn_distribution": nn_distribution,
+        "ripley_k": k_values,
+    }
+    if phase_maps is not None:
+        phase_maps = np.asarray(phase_maps, dtype=float)
+        descriptors["two_point_correlation"] = _two_point_correlation(
+            phase_maps, axes=tuple(range(1, phase_maps.ndim))
+        )
+
+    return descriptors
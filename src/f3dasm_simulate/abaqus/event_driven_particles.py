@@ -0,0 +1,434 @@
+#                                                                       Modules
+# =============================================================================
+# standard
+import math
+import time
+
+# Third party
+import numpy as np
+
+# import local functions
+from .circle_particles import CircleParticles
+from .fiber_store import FiberStore
+from .generation_profile import GenerationProfile
+from .microstructure_generator import GenerationResult
+from .neighbour_search import minimum_image
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+
+class EventDrivenCircleParticles(CircleParticles):
+    """2D RVE with disks packed by event-driven growth
+    (Lubachevsky-Stillinger) with periodic boundaries
+
+    The number of disks and their final radii are drawn up front such that
+    the disks fill `vol_req` of the RVE. The disks start as points at random
+    locations with random velocities and grow at a constant rate, the
+    trajectories are advanced from collision to collision. The generation
+    stops when the disks reach their final size or when the packing jams,
+    in which case the reached volume fraction is lower than `vol_req`. The
+    output (`fiber_positions`, `to_abaqus_format`, `crate_rgmsh`) is the
+    same as for `CircleParticles`.
+
+    Parameters
+    ----------
+    CircleParticles : class
+        2D RVE generator, provides the output formats
+    """
+
+    version = "1"
+
+    def __init__(
+        self,
+        length: float,
+        width: float,
+        radius_mu: float,
+        radius_std: float,
+        vol_req: float,
+        dist_min_factor: float = 1.1,
+        growth_rate: float = 0.01,
+        num_events_max: int = 2000000,
+        jam_tol: float = 1e-3,
+        profile: bool = False,
+        trace_file: str = None,
+    ) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        length : float
+            length of RVE
+        width : float
+            width of RVE
+        radius_mu : float
+            mean of circle's radius
+        radius_std : float
+            std of circle's radius
+        vol_req : float
+            required volume fraction
+        dist_min_factor : float, optional
+            distance factor, by default 1.1
+        growth_rate : float, optional
+            growth speed of a disk of mean radius relative to the rms
+            velocity of the disks, slower growth gives denser packings,
+            by default 0.01
+        num_events_max : int, optional
+            maximum number of collisions, by default 2000000
+        jam_tol : float, optional
+            the packing is jammed when the volume fraction grows less than
+            this relative tolerance during 20 collisions per disk, by
+            default 1e-3
+        profile : bool, optional
+            record counters and timers of the collisions and rebuilds and
+            the collisions between two rebuilds in `profile_info`, by
+            default False
+        trace_file : str, optional
+            JSONL file the profile of every rebuild and generation is
+            appended to when `profile` is True, by default None
+        """
+        # geometry information of the 2D RVE with homogeneous circles
+        self.length = length
+        self.width = width
+        self.radius_mu = radius_mu
+        self.radius_std = radius_std
+        self.vol_req = vol_req
+
+        # Initialization of the algorithm
+        self.dist_min_factor = dist_min_factor
+        self.growth_rate = growth_rate
+        self.num_events_max = num_events_max
+        self.jam_tol = jam_tol
+        self.profile = GenerationProfile(enabled=profile, trace_file=trace_file)
+
+    def generate_microstructure(
+        self,
+        seed: any = None,
+        time_budget: float = None,
+        trial_budget: int = None,
+    ) -> GenerationResult:
+        """generate the microstructure, the disks are frozen at their
+        current size when a budget is exhausted
+
+        Parameters
+        ----------
+        seed : any, optional
+            seed generator or number, by default None
+        time_budget : float, optional
+            wall-clock budget in seconds, by default None (no budget)
+        trial_budget : int, optional
+            budget of processed collisions, by default None (no budget)
+
+        Returns
+        -------
+        GenerationResult
+            reached volume fraction, collisions and rebuilds (as cycles)
+        """
+
+        # decide to use seed or not
+        self.rng = np.random.default_rng(seed=seed)
+        # counting time generating an RVE
+        start_time = time.time()
+        self._start_budget(time_budget=time_budget, trial_budget=trial_budget)
+        self._start_snapshots(None)
+        self._parameter_initialization()
+        self._procedure_initialization()
+        self._core_iteration()
+        end_time = time.time()
+        self.time_usage = end_time - start_time
+
+        if self.jammed:
+            return self._generation_result(stop_reason="jammed")
+        return self._generation_result(stop_reason="num_events_max")
+
+    def _procedure_initialization(self) -> None:
+        """draw the final radii, the initial locations and velocities of the
+        disks"""
+        # final radii, drawn until the disks fill the required volume
+        radius = []
+        vol_frac = 0.0
+        while vol_frac < self.vol_req:
+            r = self.rng.normal(self.radius_mu, self.radius_std)
+            if r <= 0:
+                continue
+            radius.append(r)
+            vol_frac = vol_frac + self.fiber_volume(r) / self.vol_total
+        self.radius = np.array(radius)
+        self.num_fibers = self.radius.shape[0]
+
+        # the disks grow as radius * scale, scale = scale_0 + growth * t
+        self.scale = 0.0
+        self.growth = self.growth_rate / self.radius_mu
+        self.time = 0.0
+
+        # the disks move as origin + velocity * t, the arrays are stored as
+        # [x, y] rows to keep the number of numpy calls per event low
+        self.box_column = self.box.reshape((2, 1))
+        self.origin = self.rng.uniform(0.0, 1.0, (2, self.num_fibers)) * self.box_column
+        self.velocity = self.rng.normal(0.0, 1.0, (2, self.num_fibers))
+        self.velocity -= self.velocity.mean(axis=1, keepdims=True)
+        # contact distances of all pairs per unit scale and their products
+        # with the growth, used in every collision prediction
+        contact = self.dist_min_factor * (
+            self.radius[np.newaxis, :] + self.radius[:, np.newaxis]
+        )
+        self.contact_sq = contact**2
+        self.contact_sq_growth = contact**2 * self.growth
+        self.contact_sq_growth_sq = (contact * self.growth) ** 2
+
+        # predicted collision time and partner of every disk
+        self.next_time = np.full(self.num_fibers, math.inf)
+        self.partner = np.full(self.num_fibers, -1)
+        self.num_events = 0
+        self.num_cycle = 0
+        self.jammed = False
+
+        # largest contact distance, limits the time a prediction made with
+        # the minimum image convention stays valid
+        self.contact_max = 2 * self.dist_min_factor * self.radius.max()
+        if self.contact_max >= 0.5 * self.box.min():
+            raise ValueError("RVE is too small for the size of the disks \n")
+
+    def _core_iteration(self) -> None:
+        """advance the disks from event to event until they reach their
+        final size or the packing jams"""
+        end_time = 1.0 / self.growth
+        # the collision time of pairs without a solution evaluates to nan
+        # or inf, they are discarded
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._event_loop(end_time)
+
+        self._finalize()
+
+    def _event_loop(self, end_time: float) -> None:
+        """process the collisions and rebuilds in order of time
+
+        Parameters
+        ----------
+        end_time : float
+            time at which the disks reach their final size
+        """
+        with self.profile.timer("neighbour_search"):
+            self._rebuild()
+        vol_frac_check = 0.0
+        num_check = 20 * self.num_fibers
+        num_events = 0
+        while True:
+            ii = int(np.argmin(self.next_time))
+            event_time = self.next_time[ii]
+            if end_time <= min(event_time, self.rebuild_time):
+                self.time = end_time
+                break
+            if self.rebuild_time <= event_time:
+                self.profile.record_cycle(
+                    cycle=self.num_cycle,
+                    num_trials=self.num_events - num_events,
+                    num_accepted=self.num_events - num_events,
+                    scale=self._scale(self.rebuild_time),
+                )
+                num_events = self.num_events
+                self.time = self.rebuild_time
+                with self.profile.timer("neighbour_search"):
+                    self._rebuild()
+                continue
+            self.time = event_time
+            with self.profile.timer("collision"):
+                self._collide(ii, int(self.partner[ii]))
+            self.num_events = self.num_events + 1
+            # every collision is a trial that is always accepted
+            self.num_trials = self.num_trials + 1
+            self.num_accepted = self.num_accepted + 1
+            if self.num_events >= self.num_events_max or self._budget_exhausted():
+                break
+            if self.num_events % num_check == 0:
+                vol_frac = self._scale(self.time) ** 2
+                if vol_frac - vol_frac_check < self.jam_tol * vol_frac:
+                    self.jammed = True
+                    break
+                vol_frac_check = vol_frac
+
+    def _scale(self, t: float) -> float:
+        """scale of the radii at time t
+
+        Parameters
+        ----------
+        t : float
+            time
+
+        Returns
+        -------
+        float
+            scale of the radii
+        """
+        return self.scale + self.growth * t
+
+    def _positions(self) -> np.ndarray:
+        """locations of all disks at the current time
+
+        Returns
+        -------
+        np.ndarray
+            locations of the disks, rows [x, y]
+        """
+        return self.origin + self.velocity * self.time
+
+    def _collision_times(
+        self, delta: np.ndarray, delta_v: np.ndarray, pairs: slice
+    ) -> np.ndarray:
+        """time until two growing disks touch, the smallest positive root of
+        |delta + delta_v t| = contact * (scale + growth * t)
+
+        Parameters
+        ----------
+        delta : np.ndarray
+            relative locations (minimum image), first axis [x, y]
+        delta_v : np.ndarray
+            relative velocities, first axis [x, y]
+        pairs : slice
+            index of the disk pairs in the contact distance matrices
+
+        Returns
+        -------
+        np.ndarray
+            time until the collision, inf if the disks do not collide
+        """
+        scale = self._scale(self.time)
+        aa = (delta_v * delta_v).sum(axis=0) - self.contact_sq_growth_sq[pairs]
+        bb = (delta * delta_v).sum(axis=0) - self.contact_sq_growth[pairs] * scale
+        cc = (delta * delta).sum(axis=0) - self.contact_sq[pairs] * scale**2
+        disc = bb * bb - aa * cc
+        sqrt_disc = np.sqrt(np.maximum(disc, 0.0))
+        # approaching disks, the gap closes at the first root. Disks that
+        # overlap by round-off collide immediately
+        tau = np.maximum(cc, 0.0) / (sqrt_disc - bb)
+        tau[(disc < 0) | (bb >= 0)] = math.inf
+        # receding disks that grow faster than they move apart collide at
+        # the second root, this form avoids cancellation for disks that
+        # have just collided
+        growing = np.flatnonzero((bb >= 0) & (aa < 0))
+        if growing.shape[0] > 0:
+            tau.flat[growing] = (-bb.flat[growing] - sqrt_disc.flat[growing]) / (
+                aa.flat[growing]
+            )
+        return tau
+
+    def _predict(self, ii: int) -> None:
+        """predict the next collision of disk ii, the predictions of the
+        other disks are updated if the collision with ii comes first
+
+        Parameters
+        ----------
+        ii : int
+            index of the disk
+        """
+        positions = self._positions()
+        delta = positions - positions[:, ii: ii + 1]
+        delta -= self.box_column * np.rint(delta / self.box_column)
+        tau = self._collision_times(
+            delta=delta,
+            delta_v=self.velocity - self.velocity[:, ii: ii + 1],
+            pairs=ii,
+        )
+        tau[ii] = math.inf
+        jj = int(np.argmin(tau))
+        self.next_time[ii] = self.time + tau[jj]
+        self.partner[ii] = jj if tau[jj] < math.inf else -1
+        earlier = self.time + tau < self.next_time
+        self.next_time[earlier] = self.time + tau[earlier]
+        self.partner[earlier] = ii
+
+    def _rebuild(self) -> None:
+        """wrap all disks into the RVE, rescale the velocities to unit rms and
+        predict the collisions of all disk pairs"""
+        self.num_cycle = self.num_cycle + 1
+        positions = np.mod(self._positions(), self.box_column)
+        # the collisions of growing disks add energy, rescale to unit rms
+        self.velocity /= np.sqrt((self.velocity**2).sum(axis=0).mean())
+        self.origin = positions - self.velocity * self.time
+        delta = positions[:, np.newaxis, :] - positions[:, :, np.newaxis]
+        delta -= self.box.reshape((2, 1, 1)) * np.rint(
+            delta / self.box.reshape((2, 1, 1))
+        )
+        tau = self._collision_times(
+            delta=delta,
+            delta_v=self.velocity[:, np.newaxis, :] - self.velocity[:, :, np.newaxis],
+            pairs=slice(None),
+        )
+        np.fill_diagonal(tau, math.inf)
+        self.partner = np.argmin(tau, axis=1)
+        self.next_time = self.time + tau[np.arange(self.num_fibers), self.partner]
+        self.partner[self.next_time == math.inf] = -1
+        self.speed_max = np.sqrt((self.velocity**2).sum(axis=0)).max()
+        self.rebuild_time = self.time + self._horizon()
+
+    def _horizon(self) -> float:
+        """time during which the minimum image of every colliding pair does
+        not change
+
+        Returns
+        -------
+        float
+            time until the next rebuild
+        """
+        return (0.5 * self.box.min() - self.contact_max) / (2 * self.speed_max)
+
+    def _collide(self, ii: int, jj: int) -> None:
+        """process the collision of disk ii and jj
+
+        Parameters
+        ----------
+        ii : int
+            index of the first disk
+        jj : int
+            index of the second disk
+        """
+        position_i = self.origin[:, ii] + self.velocity[:, ii] * self.time
+        position_j = self.origin[:, jj] + self.velocity[:, jj] * self.time
+        normal = minimum_image(position_j - position_i, self.box)
+        normal = normal / math.hypot(normal[0], normal[1])
+        # elastic collision in the frame of the growing surfaces, the disks
+        # separate faster than their gap closes by the growth
+        approach = (self.velocity[:, jj] - self.velocity[:, ii]) @ normal
+        impulse = math.sqrt(self.contact_sq_growth_sq[ii, jj]) - approach
+        self.velocity[:, ii] -= impulse * normal
+        self.velocity[:, jj] += impulse * normal
+        # the disks continue from their current location
+        self.origin[:, ii] = position_i - self.velocity[:, ii] * self.time
+        self.origin[:, jj] = position_j - self.velocity[:, jj] * self.time
+
+        # keep the rebuild horizon valid for the new velocities
+        speed = max(
+            math.hypot(self.velocity[0, ii], self.velocity[1, ii]),
+            math.hypot(self.velocity[0, jj], self.velocity[1, jj]),
+        )
+        if speed > self.speed_max:
+            self.speed_max = speed
+            self.rebuild_time = min(self.rebuild_time, self.time + self._horizon())
+
+        # every prediction involving ii or jj is outdated
+        outdated = set(
+            np.flatnonzero((self.partner == ii) | (self.partner == jj)).tolist()
+        ) | {ii, jj}
+        for kk in outdated:
+            self.next_time[kk] = math.inf
+            self.partner[kk] = -1
+        for kk in outdated:
+            self._predict(kk)
+
+    def _finalize(self) -> None:
+        """store the disks at the final time in the fiber store"""
+        # a tiny margin keeps disks in contact from overlapping
+        scale = min(self._scale(self.time), 1.0) * (1 - 1e-9)
+        fibers = np.column_stack(
+            (np.mod(self._positions(), self.box_column).T, self.radius * scale)
+        )
+        self.fiber_store = FiberStore(num_columns=3, capacity=self.num_fibers)
+        for fiber in fibers:
+            self.fiber_store.append(fiber.reshape((1, 3)))
+        self.vol_frac = self.fiber_volume(fibers[:, 2]).sum() / self.vol_total
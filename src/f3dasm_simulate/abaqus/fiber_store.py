@@ -0,0 +1,168 @@
+"""
+Array-backed storage of the fibers of the microstructure generators.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# Third party
+import numpy as np
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+
+class FiberStore:
+    """Preallocated store of fibers with stable slot ids
+
+    Every fiber occupies one row, its slot. The slot of a fiber does not
+    change when the fiber is moved, the capacity is doubled when the store
+    is full. The slot ids are used by the neighbour search structures.
+
+    Parameters
+    ----------
+    num_columns : int
+        number of columns of a row, e.g. 3 for [x, y, r]
+    capacity : int, optional
+        initial number of slots, by default 64
+    """
+
+    def __init__(self, num_columns: int, capacity: int = 64) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        num_columns : int
+            number of columns of a row
+        capacity : int, optional
+            initial number of slots, by default 64
+        """
+        self.num_columns = num_columns
+        self._data = np.zeros((max(capacity, 1), num_columns))
+        self.num_slots = 0
+
+    def __len__(self) -> int:
+        return self.num_slots
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[0]
+
+    def _grow(self, num_slots: int) -> None:
+        """double the capacity until num_slots fit in the store
+
+        Parameters
+        ----------
+        num_slots : int
+            required number of slots
+        """
+        capacity = self.capacity
+        while capacity < num_slots:
+            capacity = 2 * capacity
+        if capacity == self.capacity:
+            return
+        data = np.zeros((capacity, self.num_columns))
+        data[: self.num_slots] = self._data[: self.num_slots]
+        self._data = data
+
+    def append(self, new_fiber: np.ndarray) -> int:
+        """add a fiber to the store
+
+        Parameters
+        ----------
+        new_fiber : np.ndarray
+            the new fiber, one row
+
+        Returns
+        -------
+        int
+            slot id of the new fiber
+        """
+        slot = self.num_slots
+        self._grow(slot + 1)
+        self._data[slot] = new_fiber
+        self.num_slots = slot + 1
+        return slot
+
+    def replace(self, slot: int, new_fiber: np.ndarray) -> None:
+        """overwrite a fiber in place
+
+        Parameters
+        ----------
+        slot : int
+            slot id of the fiber
+        new_fiber : np.ndarray
+            the moved fiber, one row
+        """
+        self._data[slot] = new_fiber
+
+    def fiber(self, slot: int) -> np.ndarray:
+        """read-only view on a fiber
+
+        Parameters
+        ----------
+        slot : int
+            slot id of the fiber
+
+        Returns
+        -------
+        np.ndarray
+            the fiber, one row
+        """
+        view = self._data[slot: slot + 1]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def rows(self) -> np.ndarray:
+        """read-only view on all rows, indexed by slot id. Rows beyond the
+        number of stored fibers are not meaningful"""
+        view = self._data.view()
+        view.flags.writeable = False
+        return view
+
+    def to_array(self) -> np.ndarray:
+        """compact copy of the stored fibers in the order of the slots
+
+        Returns
+        -------
+        np.ndarray
+            fiber positions, one row per fiber
+        """
+        return self._data[: self.num_slots].copy()
+
+
+def merge_partitions(fiber_positions: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """merge the periodic partitions of `fiber_positions` back to one row
+    per fiber with the center inside the RVE
+
+    Parameters
+    ----------
+    fiber_positions : np.ndarray
+        fiber positions [x, y, (z), r, p], one row per partition, the
+        partitions of a fiber are consecutive rows
+    box : np.ndarray
+        size of the RVE along every axis
+
+    Returns
+    -------
+    np.ndarray
+        fibers [x, y, (z), r] in the order of `fiber_positions`
+    """
+    dim = box.shape[0]
+    fiber_positions = np.asarray(fiber_positions, dtype=float)
+    # keep the first partition of every fiber
+    portion = fiber_positions[:, dim + 1].astype(int).tolist()
+    first = []
+    row = 0
+    while row < len(portion):
+        first.append(row)
+        row = row + max(portion[row], 1)
+    fibers = fiber_positions[first, : dim + 1]
+    fibers[:, 0:dim] = np.mod(fibers[:, 0:dim], box)
+    return fibers
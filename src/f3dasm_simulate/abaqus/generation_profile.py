@@ -0,0 +1,175 @@
+"""
+Opt-in counters and timers of the phases of a microstructure generation.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# standard
+import json
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+# shared by all disabled profiles, entering it does nothing
+_NO_TIMER = nullcontext()
+
+
+class _PhaseTimer:
+    """context manager adding the elapsed time of a block to a phase"""
+
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile: "GenerationProfile", name: str) -> None:
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self) -> "_PhaseTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profile.add_time(self.name, time.perf_counter() - self.start)
+
+
+class GenerationProfile:
+    """counters, timers and per-cycle traces of a microstructure generation
+
+    The profile is disabled by default, `timer` then returns a shared
+    no-op context such that the hot paths of the generators are not slowed
+    down. The phases used by the generators are
+
+    - random_addition: random sequential addition stage of a cycle
+    - stirring: stirring stage of a cycle
+    - overlap_check: overlap checks of new or moved fibers
+    - neighbour_search: nearest neighbour searches
+    - periodic_images: construction of the periodic partitions of the
+      fibers crossing the boundary
+
+    Every phase records the number of calls and the accumulated time, the
+    trials and accepted fibers are recorded per cycle by `record_cycle`.
+    """
+
+    def __init__(self, enabled: bool = False,
+                 trace_file: Optional[str] = None) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        enabled : bool, optional
+            record the counters and timers, by default False
+        trace_file : str, optional
+            JSONL file to which a line is appended for every cycle and for
+            the summary of every generation, by default None (no trace).
+            Only used when the profile is enabled
+        """
+        self.enabled = enabled
+        self.trace_file = trace_file
+        self.reset()
+
+    def reset(self) -> None:
+        """clear the counters, timers and cycle traces"""
+        self.timers: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.cycles = []
+
+    def timer(self, name: str):
+        """time a block of code as part of a phase
+
+        Parameters
+        ----------
+        name : str
+            name of the phase
+
+        Returns
+        -------
+        context manager
+            adds the elapsed time of the block and one call to the phase
+        """
+        if not self.enabled:
+            return _NO_TIMER
+        return _PhaseTimer(self, name)
+
+    def add_time(self, name: str, elapsed: float) -> None:
+        """add the elapsed time and one call to a phase
+
+        Parameters
+        ----------
+        name : str
+            name of the phase
+        elapsed : float
+            elapsed time in seconds
+        """
+        self.timers[name] = self.timers.get(name, 0.0) + elapsed
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def record_cycle(self, **fields: Any) -> None:
+        """record the trace of a finished cycle, e.g. the trials and the
+        accepted fibers of the cycle
+
+        Parameters
+        ----------
+        fields : Any
+            json serializable information of the cycle
+        """
+        if not self.enabled:
+            return
+        num_trials = fields.get("num_trials", 0)
+        if "num_accepted" in fields:
+            fields["acceptance_rate"] = (
+                fields["num_accepted"] / num_trials if num_trials else 0.0
+            )
+        self.cycles.append(fields)
+        self._write_trace({"event": "cycle", **fields})
+
+    def finish(self, **fields: Any) -> None:
+        """write the summary of a finished generation to the trace
+
+        Parameters
+        ----------
+        fields : Any
+            json serializable information of the generation
+        """
+        if self.enabled:
+            self._write_trace({
+                "event": "summary",
+                **fields,
+                "timers": self.timers,
+                "counters": self.counters,
+            })
+
+    def to_dict(self) -> dict:
+        """structured summary of the profile
+
+        Returns
+        -------
+        dict
+            timers (seconds per phase), counters (calls per phase) and
+            cycles (trace of every cycle)
+        """
+        return {
+            "timers": dict(self.timers),
+            "counters": dict(self.counters),
+            "cycles": list(self.cycles),
+        }
+
+    def _write_trace(self, line: dict) -> None:
+        """append a line to the JSONL trace
+
+        Parameters
+        ----------
+        line : dict
+            json serializable content of the line
+        """
+        if self.trace_file is None:
+            return
+        with open(self.trace_file, "a") as fp:
+            fp.write(json.dumps(line) + "\n")
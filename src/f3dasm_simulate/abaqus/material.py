@@ -7,7 +7,7 @@ Material module for the simulation
 
 # Standard
 from abc import ABC
-from typing import List
+from functools import lru_cache
 
 # Third party
 import matplotlib.pyplot as plt
@@ -67,23 +67,59 @@ class CompositeMaterial(SimulatorPart):
                 **self.fiber_material.to_dict()}
 
 
+@lru_cache(maxsize=128)
+def _hardening_table(law: type, a: float, b: float, yield_stress: float,
+                     n_points: int) -> np.ndarray:
+    """Hardening law table of a hardening law class and its parameters,
+    computed once per (class, a, b, yield_stress, n_points).
+
+    Returns
+    -------
+        Read-only table with the stress in the first row and the strain in
+        the second row
+    """
+    table = np.zeros((2, n_points))
+    table[1, :] = np.linspace(0, 1, n_points)
+    table[0, :] = law._stress(table[1, :], a=a, b=b, yield_stress=yield_stress)
+    # the last point extends the table to large strains
+    table[1, -1] = 10.0
+    table[0, -1] = law._stress(table[1, -1], a=a, b=b, yield_stress=yield_stress)
+    table.setflags(write=False)
+    return table
+
+
 class HardeningLaw(ABC):
-    def __init__(self, a: float = 0.2, b: float = 0.4, yield_stress: float = 0.5) -> None:
+    def __init__(self, a: float = 0.2, b: float = 0.4, yield_stress: float = 0.5,
+                 n_points: int = 101) -> None:
         """Abstract class for the hardening law. The hardening law is defined
         by the hardening law table. The hardening law table is a 2D array
-        with the first row being the strain and the second row being the
-        stress.
+        with the first row being the stress and the second row being the
+        strain.
+
+        Parameters
+        ----------
+        n_points, optional
+            number of points of the hardening law table, by default 101
         """
         self.a = a
         self.b = b
         self.yield_stress = yield_stress
-        self._calculate_hardening_table()
+        self.n_points = n_points
 
     @property
-    def hardening_law_table(self) -> List[float]:
+    def hardening_law_table(self) -> np.ndarray:
+        """Read-only hardening law table, shared by all hardening laws of the
+        same class and parameters"""
         return self._calculate_hardening_table()
 
-    def _calculate_hardening_table(self) -> List[float]:
+    def _calculate_hardening_table(self) -> np.ndarray:
+        return _hardening_table(type(self), float(self.a), float(self.b),
+                                float(self.yield_stress), int(self.n_points))
+
+    @staticmethod
+    def _stress(strain: np.ndarray, a: float, b: float,
+                yield_stress: float) -> np.ndarray:
+        """Stress of the hardening law at the given strains"""
         ...
 
     def plot(self, **kwargs):
@@ -107,69 +143,24 @@ class HardeningLaw(ABC):
 
 
 class LinearHardeningLaw(HardeningLaw):
-    def _calculate_hardening_table(self) -> List[float]:
-        # get the arguements
-        yield_stress = self.yield_stress
-        a = self.a
-        # dfine the table for hardening law
-        hardening_law_table = np.zeros((101, 2))
-        hardening_law_table[:, 1] = np.linspace(0, 1, 101)
-
-        # generate the hardening law
-        hardening_law_table[:, 0] = (
-            yield_stress + a * hardening_law_table[:, 1]
-        )
-        hardening_law_table[-1, 1] = 10.0
-        hardening_law_table[-1, 0] = (
-            yield_stress + a * hardening_law_table[-1, 1]
-        )
-
-        hardening_law_table = hardening_law_table.T
-        return hardening_law_table.tolist()
+    @staticmethod
+    def _stress(strain: np.ndarray, a: float, b: float,
+                yield_stress: float) -> np.ndarray:
+        return yield_stress + a * strain
 
 
 class SwiftHardeningLaw(HardeningLaw):
-    def _calculate_hardening_table(self) -> List[float]:
-        # get the arguements
-        yield_stress = self.yield_stress
-        a = self.a
-        b = self.b
-        # dfine the table for hardening law
-        hardening_law_table = np.zeros((101, 2))
-        hardening_law_table[:, 1] = np.linspace(0, 1, 101)
-        # generate the hardening law
-        hardening_law_table[:, 0] = (
-            yield_stress + a * (hardening_law_table[:, 1]) ** b
-        )
-        hardening_law_table[-1, 1] = 10.0
-        hardening_law_table[-1, 0] = (
-            yield_stress + a * (hardening_law_table[-1, 1]) ** b
-        )
-        hardening_law_table = hardening_law_table.T
-        return hardening_law_table.tolist()
+    @staticmethod
+    def _stress(strain: np.ndarray, a: float, b: float,
+                yield_stress: float) -> np.ndarray:
+        return yield_stress + a * strain ** b
 
 
 class RambergHardeningLaw(HardeningLaw):
-    def _calculate_hardening_table(self) -> List[float]:
-        # get the arguements
-        yield_stress = self.yield_stress
-        a = self.a
-        b = self.b
-        # define the table for hardening law
-        hardening_law_table = np.zeros((101, 2))
-        hardening_law_table[:, 1] = np.linspace(0, 1, 101)
-
-        # generate the hardening law
-        hardening_law_table[:, 0] = yield_stress * (
-            1 + a * (hardening_law_table[:, 1])
-        ) ** (1 / b)
-        hardening_law_table[-1, 1] = 10.0
-        hardening_law_table[-1, 0] = yield_stress * (
-            1 + a * (hardening_law_table[-1, 1])
-        ) ** (1 / b)
-
-        hardening_law_table = hardening_law_table.T
-        return hardening_law_table.tolist()
+    @staticmethod
+    def _stress(strain: np.ndarray, a: float, b: float,
+                yield_stress: float) -> np.ndarray:
+        return yield_stress * (1 + a * strain) ** (1 / b)
 
 #                                                           Material Subclasses
 # =============================================================================
@@ -219,4 +210,5 @@ class PlasticMaterial(Material):
     def to_dict(self) -> dict:
         return {f"youngs_modulus{self.suffix}": self.youngs_modulus,
                 f"poisson_ratio{self.suffix}": self.poisson_ratio,
-                'hardening_table': self.hardening_law.hardening_law_table}
+                # lists only at the serialization boundary
+                'hardening_table': self.hardening_law.hardening_law_table.tolist()}
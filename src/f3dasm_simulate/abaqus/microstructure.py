@@ -5,11 +5,20 @@ Microstructure module for the f3dasm_simulate package.
 #                                                                       Modules
 # =============================================================================
 
-from typing import Tuple
+import dataclasses
+import multiprocessing
+import os
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
 
 from .circle_particles import CircleParticles
+from .event_driven_particles import EventDrivenCircleParticles
+from .microstructure_cache import MicrostructureCache
+from .microstructure_generator import GenerationResult, MicrostructureGenerator
 from .simulator_part import SimulatorPart
 from .sphere_particles import SphereParticles
+from .tiled_particles import TiledCircleParticles
 
 #                                                        Authorship and Credits
 # =============================================================================
@@ -21,6 +30,72 @@ __status__ = 'Stable'
 # =============================================================================
 
 
+def _available_cpus() -> int:
+    """Number of CPUs the process may run on
+
+    Returns
+    -------
+        Number of available CPUs, at least 1
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+class MicrostructureRejectedError(ValueError):
+    """Raised when no generated microstructure reaches the required volume
+    fraction within the tolerance"""
+
+
+def _run_generator(generator_class: type, generator_kwargs: dict,
+                   budgets: dict, seed: Optional[int]
+                   ) -> MicrostructureGenerator:
+    """Generate a microstructure with a given seed
+
+    Parameters
+    ----------
+    generator_class
+        Class of the generator
+    generator_kwargs
+        Keyword arguments of the generator
+    budgets
+        Time and trial budget of the generation
+    seed
+        Seed of the generator
+
+    Returns
+    -------
+        Generator holding the microstructure
+    """
+    generator = generator_class(**generator_kwargs)
+    generator.generate_microstructure(seed=seed, **budgets)
+    return generator
+
+
+def _create_with_seed(args: Tuple[type, type, dict, dict, Optional[int]]
+                      ) -> tuple:
+    """Generate a microstructure with a given seed, executed by the workers
+    of the speculative generation. Only the parameters of the generator are
+    sent to the worker and only the microstructure and the summary of the
+    generation are sent back
+
+    Parameters
+    ----------
+    args
+        Microstructure class, generator class, keyword arguments of the
+        generator, time and trial budget and seed of the generator
+
+    Returns
+    -------
+        Seed, microstructure information in abaqus format, reached volume
+        fraction and summary of the generation
+    """
+    microstructure_class, generator_class, generator_kwargs, budgets, seed = args
+    generator = _run_generator(generator_class, generator_kwargs, budgets, seed)
+    return (seed, microstructure_class._abaqus_format(generator),
+            generator.vol_frac, generator.result)
+
+
 #                                                              Abstract Classes
 # =============================================================================
 
@@ -28,18 +103,338 @@ __status__ = 'Stable'
 class Microstructure(SimulatorPart):
     def __init__(self, size: float = 0.048, radius_mu: float = 0.003,
                  radius_std: float = 0.0,
-                 vol_req: float = 0.3, seed: int = 42):
+                 vol_req: float = 0.3, seed: int = 42,
+                 disk_cache: MicrostructureCache = None,
+                 time_budget: Optional[float] = None,
+                 trial_budget: Optional[int] = None,
+                 vol_frac_tol: Optional[float] = None,
+                 num_resample: int = 0,
+                 n_workers: int = 1):
+        """Microstructure
+
+        Parameters
+        ----------
+        size
+            Size of the RVE
+        radius_mu
+            Mean radius of the fibers
+        radius_std
+            Standard deviation of the radius of the fibers
+        vol_req
+            Required volume fraction
+        seed
+            Seed of the generator
+        disk_cache
+            Disk cache of generated microstructures, by default None
+        time_budget
+            Wall-clock budget in seconds of one generation, the best
+            microstructure so far is returned when it is exceeded,
+            by default None (no budget)
+        trial_budget
+            Budget of trials of one generation, by default None (no budget)
+        vol_frac_tol
+            Relative tolerance on the reached volume fraction, a
+            microstructure is accepted if it reaches
+            vol_req * (1 - vol_frac_tol). By default None, every generated
+            microstructure is accepted
+        num_resample
+            Number of extra seeds (seed + 1, seed + 2, ...) tried when a
+            microstructure is rejected, by default 0
+        n_workers
+            Number of worker processes. If larger than 1, the seeds are
+            generated in parallel and, as with one worker, the accepted
+            microstructure of the lowest seed is used. The generations of
+            the higher seeds are cancelled once it is known. The workers
+            only return the microstructure, `microstructure_generator` is
+            None. The number of workers is capped at the number of
+            available CPUs, since `time_budget` is wall-clock time per
+            generation and oversubscribed workers would exhaust it early.
+            The winning seed is stored in `seed_used`, by default 1 (the
+            seeds are tried one after the other)
+
+        Raises
+        ------
+        MicrostructureRejectedError
+            If none of the generated microstructures is accepted
+        """
         self.size = size
         self.radius_mu = radius_mu
         self.radius_std = radius_std
         self.vol_req = vol_req
         self.seed = seed
+        self.disk_cache = disk_cache
+        self.time_budget = time_budget
+        self.trial_budget = trial_budget
+        self.vol_frac_tol = vol_frac_tol
+        self.num_resample = num_resample
+        self.n_workers = n_workers
+
+        self.seed_used = None
+        self.microstructure_generator = None
+        self.generation_result: Optional[GenerationResult] = None
+        self._cache_key = None
+        self._cache = None
+        self.get_microstructure()
+
+    def _generator_kwargs(self) -> dict:
+        """Keyword arguments of the generator
+
+        Returns
+        -------
+            Keyword arguments of `generator`
+        """
+        ...
+
+    @staticmethod
+    def _abaqus_format(generator: MicrostructureGenerator) -> dict:
+        """Microstructure information of a generator in abaqus format
 
-        self._create_microstructure()
+        Parameters
+        ----------
+        generator
+            Generator holding the microstructure
 
-    def _create_microstructure(self) -> Tuple[dict, float]:
+        Returns
+        -------
+            Microstructure information in abaqus format
+        """
         ...
 
+    def _budgets(self) -> dict:
+        """Time and trial budget of one generation
+
+        Returns
+        -------
+            Keyword arguments of `generate_microstructure`
+        """
+        return {"time_budget": self.time_budget,
+                "trial_budget": self.trial_budget}
+
+    def _create_microstructure(self, seed: int) -> Tuple[dict, float]:
+        """Generate a microstructure with a given seed, the generator is
+        stored in `microstructure_generator`
+
+        Parameters
+        ----------
+        seed
+            Seed of the generator
+
+        Returns
+        -------
+            Microstructure information in abaqus format and the reached
+            volume fraction
+        """
+        self.microstructure_generator = _run_generator(
+            self.generator, self._generator_kwargs(), self._budgets(), seed)
+        return (self._abaqus_format(self.microstructure_generator),
+                self.microstructure_generator.vol_frac)
+
+    def _parameters(self) -> tuple:
+        """Parameters that determine the generated microstructure
+
+        Returns
+        -------
+            Tuple of the parameters, used as key of the cached microstructure
+        """
+        return (self.size, self.radius_mu, self.radius_std, self.vol_req,
+                self.seed, self.time_budget, self.trial_budget,
+                self.vol_frac_tol, self.num_resample, self.n_workers)
+
+    def _accept(self, vol_frac: float) -> bool:
+        """Check the reached volume fraction against the tolerance
+
+        Parameters
+        ----------
+        vol_frac
+            Reached volume fraction
+
+        Returns
+        -------
+            True if the microstructure is accepted
+        """
+        if self.vol_frac_tol is None:
+            return True
+        return vol_frac >= self.vol_req * (1.0 - self.vol_frac_tol)
+
+    def _generate_microstructure(self) -> Tuple[dict, float]:
+        """Generate microstructures with seed, seed + 1, ... until one is
+        accepted. The seeds are generated in parallel if `n_workers` is
+        larger than 1. The accepted seed is stored in `seed_used` and the
+        summary of its generation in `generation_result`.
+
+        Returns
+        -------
+            Microstructure information in abaqus format and the reached
+            volume fraction
+
+        Raises
+        ------
+        MicrostructureRejectedError
+            If none of the generated microstructures is accepted
+        """
+        seeds = [self.seed if self.seed is None else self.seed + attempt
+                 for attempt in range(self.num_resample + 1)]
+        num_workers = min(self.n_workers, len(seeds), _available_cpus())
+        if num_workers > 1:
+            self.microstructure_generator = None
+            args = [(type(self), self.generator, self._generator_kwargs(),
+                     self._budgets(), seed) for seed in seeds]
+            # the results arrive in the order of the seeds, leaving the pool
+            # terminates the workers, which cancels the seeds that are
+            # still running
+            with multiprocessing.Pool(num_workers) as pool:
+                return self._first_accepted(
+                    pool.imap(_create_with_seed, args))
+
+        return self._first_accepted(self._serial_candidates(seeds))
+
+    def _serial_candidates(self, seeds: Iterable[Optional[int]]
+                           ) -> Iterable[tuple]:
+        """Generate the microstructures of the seeds one after the other,
+        the generator of the last one is kept in `microstructure_generator`
+
+        Parameters
+        ----------
+        seeds
+            Seeds of the generator
+
+        Yields
+        ------
+            Seed, microstructure information, reached volume fraction and
+            summary of the generation
+        """
+        for seed in seeds:
+            microstructure_info, vol_frac = self._create_microstructure(seed)
+            yield (seed, microstructure_info, vol_frac,
+                   self.microstructure_generator.result)
+
+    def _first_accepted(self, candidates: Iterable[tuple]
+                        ) -> Tuple[dict, float]:
+        """Return the first accepted of the generated microstructures
+
+        Parameters
+        ----------
+        candidates
+            Seed, microstructure information, reached volume fraction and
+            summary of the generation of every generated microstructure,
+            in the order of the seeds
+
+        Returns
+        -------
+            Microstructure information in abaqus format and the reached
+            volume fraction
+
+        Raises
+        ------
+        MicrostructureRejectedError
+            If none of the generated microstructures is accepted
+        """
+        vol_fracs = []
+        for seed, microstructure_info, vol_frac, result in candidates:
+            if self._accept(vol_frac):
+                self.seed_used = seed
+                self.generation_result = result
+                return microstructure_info, vol_frac
+            vol_fracs.append(vol_frac)
+
+        raise MicrostructureRejectedError(
+            f"Required volume fraction {self.vol_req} (tolerance "
+            f"{self.vol_frac_tol}) is not reached, reached volume fractions "
+            f"{vol_fracs} with {self.num_resample + 1} seed(s) starting at "
+            f"{self.seed}")
+
+    def get_microstructure(self) -> Tuple[dict, float]:
+        """Return the generated microstructure. The microstructure is generated
+        once and cached on the instance, it is generated again when one of
+        size, radius_mu, radius_std, vol_req or seed has changed.
+
+        Returns
+        -------
+            Microstructure information in abaqus format and the reached
+            volume fraction
+        """
+        key = self._parameters()
+        if self._cache is None or self._cache_key != key:
+            self._cache = self._load_or_create_microstructure()
+            self._cache_key = key
+        return self._cache
+
+    def _disk_cache_parameters(self) -> dict:
+        """Parameters that address the microstructure in the disk cache
+
+        Returns
+        -------
+            Parameters of the microstructure and name and version of the
+            generator
+        """
+        return {
+            "microstructure": type(self).__name__,
+            "generator": self.generator.__name__,
+            "generator_version": self.generator.version,
+            "size": self.size,
+            "radius_mu": self.radius_mu,
+            "radius_std": self.radius_std,
+            "vol_req": self.vol_req,
+            "seed": self.seed,
+            "dist_min_factor": self.dist_min_factor,
+            "time_budget": self.time_budget,
+            "trial_budget": self.trial_budget,
+            "vol_frac_tol": self.vol_frac_tol,
+            "num_resample": self.num_resample,
+            "n_workers": self.n_workers,
+        }
+
+    def _load_or_create_microstructure(self) -> Tuple[dict, float]:
+        """Load the microstructure from the disk cache or generate it and
+        store it in the disk cache. The microstructure is always generated
+        if no disk cache is set or the seed is None (every generation is a
+        different microstructure). A microstructure loaded from the disk
+        cache restores `seed_used` and `generation_result`, it has no
+        `microstructure_generator`.
+
+        Returns
+        -------
+            Microstructure information in abaqus format and the reached
+            volume fraction
+        """
+        if self.disk_cache is None or self.seed is None:
+            return self._generate_microstructure()
+
+        key = self.disk_cache.key(self._disk_cache_parameters())
+        entry = self.disk_cache.load(key)
+        if entry is not None:
+            fiber_positions, info = entry
+            vol_frac = info.pop("vol_frac")
+            self.seed_used = info.pop("seed_used")
+            result = info.pop("generation_result", None)
+            self.microstructure_generator = None
+            self.generation_result = (
+                None if result is None else GenerationResult(**result))
+            microstructure_info = {
+                "location_information": fiber_positions.tolist(), **info}
+            return microstructure_info, vol_frac
+
+        microstructure_info, vol_frac = self._generate_microstructure()
+        info = {key_: value for key_, value in microstructure_info.items()
+                if key_ != "location_information"}
+        # numpy scalars of the summary are not json serializable
+        result = {name: value.item() if isinstance(value, np.generic) else value
+                  for name, value in dataclasses.asdict(
+                      self.generation_result).items()}
+        self.disk_cache.save(
+            key,
+            fiber_positions=np.asarray(
+                microstructure_info["location_information"]),
+            info={**info, "vol_frac": vol_frac, "seed_used": self.seed_used,
+                  "generation_result": result},
+        )
+        return microstructure_info, vol_frac
+
+    def clear_cache(self):
+        """Discard the cached microstructure"""
+        self._cache_key = None
+        self._cache = None
+
     def to_dict(self) -> dict:
         """Return a dictionary representation of the microstructure.
 
@@ -48,7 +443,7 @@ class Microstructure(SimulatorPart):
             Dictionary representation of the microstructure
             for the SimulatorInfo
         """
-        microstructure_info, vol_frac = self._create_microstructure()
+        microstructure_info, vol_frac = self.get_microstructure()
         return {**microstructure_info, "vol_frac": vol_frac}
 
 #                                                               Implementations
@@ -56,36 +451,104 @@ class Microstructure(SimulatorPart):
 
 
 class CircleMicrostructure(Microstructure):
-    def _create_microstructure(self) -> Tuple[dict, float]:
-        self.microstructure_generator = CircleParticles(
-            length=self.size,
-            width=self.size,
-            radius_mu=self.radius_mu,
-            radius_std=self.radius_std,
-            vol_req=self.vol_req,
-            dist_min_factor=1.2,
-        )
-        self.microstructure_generator.generate_microstructure(seed=self.seed)
-        microstructure_info = self.microstructure_generator.to_abaqus_format(
-            save_file=False
-        )
-        # self.microstructure_generator.plot_microstructure(save_figure=True)
+    generator = CircleParticles
+    dist_min_factor = 1.2
+    generators = {
+        "rsa": CircleParticles,
+        "event_driven": EventDrivenCircleParticles,
+        "tiled": TiledCircleParticles,
+    }
+
+    def __init__(self, size: float = 0.048, radius_mu: float = 0.003,
+                 radius_std: float = 0.0,
+                 vol_req: float = 0.3, seed: int = 42,
+                 disk_cache: MicrostructureCache = None,
+                 time_budget: Optional[float] = None,
+                 trial_budget: Optional[int] = None,
+                 vol_frac_tol: Optional[float] = None,
+                 num_resample: int = 0,
+                 n_workers: int = 1,
+                 packing: str = "rsa"):
+        """Circle microstructure
+
+        Parameters
+        ----------
+        size
+            Size of the square RVE
+        radius_mu
+            Mean radius of the fibers
+        radius_std
+            Standard deviation of the radius of the fibers
+        vol_req
+            Required volume fraction
+        seed
+            Seed of the generator
+        disk_cache
+            Disk cache of generated microstructures, by default None
+        time_budget
+            Wall-clock budget in seconds of one generation, by default None
+        trial_budget
+            Budget of trials of one generation, by default None
+        vol_frac_tol
+            Relative tolerance on the reached volume fraction, by default
+            None (accept every microstructure)
+        num_resample
+            Number of extra seeds tried when a microstructure is rejected,
+            by default 0
+        n_workers
+            Number of worker processes, the seeds are generated in parallel
+            if larger than 1 and the accepted microstructure of the lowest
+            seed is used, capped at the number of available CPUs, by
+            default 1
+        packing
+            Packing algorithm, "rsa" (random sequential addition with
+            stirring), "event_driven" (Lubachevsky-Stillinger growth, for
+            high volume fractions) or "tiled" (random sequential addition
+            on 4 x 4 tiles, for large RVEs), by default "rsa"
+        """
+        if packing not in self.generators:
+            raise ValueError(
+                f"packing should be one of {list(self.generators)}, "
+                f"got {packing}")
+        self.packing = packing
+        self.generator = self.generators[packing]
+        super().__init__(size=size, radius_mu=radius_mu,
+                         radius_std=radius_std, vol_req=vol_req, seed=seed,
+                         disk_cache=disk_cache, time_budget=time_budget,
+                         trial_budget=trial_budget, vol_frac_tol=vol_frac_tol,
+                         num_resample=num_resample, n_workers=n_workers)
+
+    def _generator_kwargs(self) -> dict:
+        return {
+            "length": self.size,
+            "width": self.size,
+            "radius_mu": self.radius_mu,
+            "radius_std": self.radius_std,
+            "vol_req": self.vol_req,
+            "dist_min_factor": self.dist_min_factor,
+        }
 
-        return microstructure_info, self.microstructure_generator.vol_frac
+    @staticmethod
+    def _abaqus_format(generator: MicrostructureGenerator) -> dict:
+        # generator.plot_microstructure(save_figure=True)
+        return generator.to_abaqus_format(save_file=False)
 
 
 class SphereMicrostructure(Microstructure):
-    def _create_microstructure(self) -> Tuple[dict, float]:
-        self.microstructure_generator = SphereParticles(
-            length=self.size,
-            width=self.size,
-            height=self.size,
-            radius_mu=self.radius_mu,
-            radius_std=self.radius_std,
-            vol_req=self.vol_req,
-        )
-        self.microstructure_generator.generate_microstructure(seed=self.seed)
-        microstructure_info = self.microstructure_generator.to_abaqus_format(
-            file_name="micro_structure.json"
-        )
-        return microstructure_info, self.microstructure_generator.vol_frac
+    generator = SphereParticles
+    dist_min_factor = 1.1
+
+    def _generator_kwargs(self) -> dict:
+        return {
+            "length": self.size,
+            "width": self.size,
+            "height": self.size,
+            "radius_mu": self.radius_mu,
+            "radius_std": self.radius_std,
+            "vol_req": self.vol_req,
+            "dist_min_factor": self.dist_min_factor,
+        }
+
+    @staticmethod
+    def _abaqus_format(generator: MicrostructureGenerator) -> dict:
+        return generator.to_abaqus_format(file_name="micro_structure.json")
@@ -0,0 +1,248 @@
+"""
+Content-addressed on-disk cache of generated microstructures.
+"""
+
+#                                                                       Modules
+# =============================================================================
+
+# Standard
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+from typing import Optional, Tuple
+
+# Third party
+import numpy as np
+
+#                                                        Authorship and Credits
+# =============================================================================
+__author__ = 'Jiaxiang Yi (J.Yi@tudelft.nl), Martin van der Schelling (M.P.vanderSchelling@tudelft.nl)'
+__credits__ = ['Martin van der Schelling', 'Jiaxiang Yi']
+__status__ = 'Stable'
+# =============================================================================
+#
+# =============================================================================
+
+
+class MicrostructureCache:
+    def __init__(self, directory: str, max_size: Optional[int] = 2**30,
+                 max_entries: Optional[int] = None,
+                 orphan_age: float = 3600.0):
+        """Persistent cache of generated microstructures that can be shared
+        by several processes on a common filesystem.
+
+        Every entry is addressed by the hash of the parameters of the
+        microstructure and consists of a ``<key>.npy`` file with the fiber
+        positions and a ``<key>.json`` file with the remaining information.
+        Files are written to a temporary file first and moved in place, the
+        json file is written last and marks a complete entry. The least
+        recently used entries are evicted when the cache grows beyond
+        `max_size` bytes or `max_entries` entries. The size of the cache is
+        tracked between saves, the directory is only scanned when the
+        limits are reached, and then a tenth of the limits is freed in
+        addition. Entries saved by other processes are counted at the next
+        scan.
+
+        Parameters
+        ----------
+        directory
+            Directory of the cache, created if it does not exist
+        max_size
+            Maximum total size of the cache in bytes, None for no limit,
+            by default 1 GiB
+        max_entries
+            Maximum number of entries, None for no limit, by default None
+        orphan_age
+            Age in seconds after which files of incomplete entries (a
+            ``.npy`` file without ``.json`` file, or a temporary file) are
+            considered left over by an interrupted process and removed,
+            by default 1 hour
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.orphan_age = orphan_age
+        # estimated total size and number of entries, None until the first
+        # scan of the directory
+        self._usage: Optional[Tuple[int, int]] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(parameters: dict) -> str:
+        """Hash of the parameters of a microstructure
+
+        Parameters
+        ----------
+        parameters
+            Parameters that determine the microstructure, including the
+            name and version of the generator
+
+        Returns
+        -------
+            Hex digest used as name of the cache entry
+        """
+        content = json.dumps(parameters, sort_keys=True)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, dict]]:
+        """Load a cached microstructure
+
+        Parameters
+        ----------
+        key
+            Key of the entry
+
+        Returns
+        -------
+            Fiber positions and the remaining information, None if the entry
+            is not in the cache
+        """
+        try:
+            with open(self._path(key, ".json"), "r") as fp:
+                info = json.load(fp)
+            fiber_positions = np.load(self._path(key, ".npy"))
+            # mark the entry as recently used
+            os.utime(self._path(key, ".json"))
+        except (FileNotFoundError, ValueError):
+            # missing, evicted by another process or partially written
+            return None
+
+        return fiber_positions, info
+
+    def save(self, key: str, fiber_positions: np.ndarray, info: dict):
+        """Store a microstructure in the cache
+
+        Parameters
+        ----------
+        key
+            Key of the entry
+        fiber_positions
+            Fiber positions, one row per fiber (partition)
+        info
+            Remaining json serializable information of the microstructure
+        """
+        paths = (self._path(key, ".json"), self._path(key, ".npy"))
+        # an existing entry is overwritten, its files are already counted
+        is_new = not os.path.exists(paths[0])
+        old_size = sum(os.path.getsize(path) for path in paths
+                       if os.path.exists(path))
+        self._atomic_write(
+            paths[1], lambda fp: np.save(fp, np.asarray(fiber_positions)),
+            "wb")
+        self._atomic_write(paths[0], lambda fp: json.dump(info, fp), "w")
+        if self._usage is not None:
+            size = sum(os.path.getsize(path) for path in paths) - old_size
+            self._usage = (self._usage[0] + size,
+                           self._usage[1] + int(is_new))
+        if self._usage is None or self._exceeds(*self._usage):
+            self.evict(slack=0.1)
+
+    def _atomic_write(self, path: str, write, mode: str):
+        """Write a file through a temporary file in the same directory
+
+        Parameters
+        ----------
+        path
+            Final path of the file
+        write
+            Function that writes the content to an open file object
+        mode
+            File mode, "w" or "wb"
+        """
+        handle, temp_path = tempfile.mkstemp(dir=self.directory,
+                                             suffix=".tmp")
+        try:
+            with os.fdopen(handle, mode) as fp:
+                write(fp)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _exceeds(self, total_size: int, num_entries: int,
+                 slack: float = 0.0) -> bool:
+        """Check the size and number of entries against the limits
+
+        Parameters
+        ----------
+        total_size
+            Total size in bytes
+        num_entries
+            Number of entries
+        slack
+            Fraction of the limits that should be free, by default 0.0
+
+        Returns
+        -------
+            True if one of the limits is exceeded
+        """
+        return (
+            (self.max_size is not None
+             and total_size > (1.0 - slack) * self.max_size)
+            or (self.max_entries is not None
+                and num_entries > max(
+                    1, math.floor((1.0 - slack) * self.max_entries))))
+
+    def evict(self, slack: float = 0.0):
+        """Remove the least recently used entries until the cache satisfies
+        `max_size` and `max_entries`. Files of incomplete entries older
+        than `orphan_age` are removed, younger ones may still be written by
+        another process and count towards the size
+
+        Parameters
+        ----------
+        slack
+            Fraction of the limits that is freed in addition, by default 0.0
+        """
+        names = set(os.listdir(self.directory))
+        now = time.time()
+        entries = []
+        orphan_size = 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if name.endswith(".json"):
+                    key = name[:-len(".json")]
+                    size = (stat.st_size
+                            + os.path.getsize(self._path(key, ".npy")))
+                    entries.append((stat.st_mtime, size, key))
+                elif name.endswith(".tmp") or (
+                        name.endswith(".npy")
+                        and name[:-len(".npy")] + ".json" not in names):
+                    if now - stat.st_mtime > self.orphan_age:
+                        os.remove(path)
+                    else:
+                        orphan_size += stat.st_size
+            except FileNotFoundError:
+                continue
+
+        entries.sort()
+        total_size = orphan_size + sum(size for _, size, _ in entries)
+        while entries and self._exceeds(total_size, len(entries), slack):
+            _, size, key = entries.pop(0)
+            total_size -= size
+            self.remove(key)
+        self._usage = (total_size, len(entries))
+
+    def remove(self, key: str):
+        """Remove an entry from the cache
+
+        Parameters
+        ----------
+        key
+            Key of the entry
+        """
+        # the json file goes first, so the entry is never seen incomplete
+        for suffix in (".json", ".npy"):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
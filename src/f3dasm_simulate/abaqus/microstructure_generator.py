@@ -1,12 +1,20 @@
 #                                                                       Modules
 # =============================================================================
 
-from typing import Any
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
 # Third-party
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Local
+from .descriptors import nearest_neighbour_distances, ripley_k, two_point_correlation
+from .fiber_store import merge_partitions
+from .generation_profile import GenerationProfile
+from .phase_map import PhaseMap
+
 #                                                          Authorship & Credits
 # =============================================================================
 __author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
@@ -17,20 +25,344 @@ __status__ = "Stable"
 # =============================================================================
 
 
+@dataclass
+class GenerationResult:
+    """summary of a microstructure generation
+
+    Parameters
+    ----------
+    vol_req : float
+        required volume fraction
+    vol_frac : float
+        reached volume fraction
+    num_fibers : int
+        number of generated fibers
+    num_trials : int
+        number of trials (random fibers drawn or collisions processed)
+    num_accepted : int
+        number of accepted trials
+    num_cycles : int
+        number of cycles used
+    time_usage : float
+        generation time in seconds
+    stop_reason : str
+        reason the generation stopped, "vol_req", "time_budget",
+        "trial_budget" or a generator specific limit
+    """
+
+    vol_req: float
+    vol_frac: float
+    num_fibers: int
+    num_trials: int
+    num_accepted: int
+    num_cycles: int
+    time_usage: float
+    stop_reason: str
+
+    @property
+    def acceptance_rate(self) -> float:
+        """fraction of the trials that are accepted"""
+        if self.num_trials == 0:
+            return 0.0
+        return self.num_accepted / self.num_trials
+
+    @property
+    def success(self) -> bool:
+        """the required volume fraction is reached"""
+        return self.vol_frac >= self.vol_req
+
+
 class MicrostructureGenerator:
     "base class of mirostructure generator"
 
-    def generate_microstructure(self, seed: Any = None) -> float:
+    # disabled profile, replaced by the generators that are created with
+    # profile=True
+    profile = GenerationProfile()
+
+    @property
+    def fiber_positions(self) -> np.ndarray:
+        """location information of the fibers, one row per partition. The
+        partitions of a fiber crossing the boundary are consecutive rows,
+        they are created from the stored fibers on every access
+
+        Returns
+        -------
+        np.ndarray
+            fiber positions, None if no microstructure is generated yet
+        """
+        if getattr(self, "fiber_store", None) is None:
+            return None
+        with self.profile.timer("periodic_images"):
+            return self.split_fibers(self.fiber_store.to_array())
+
+    @property
+    def profile_info(self) -> dict:
+        """counters, timers and per-cycle traces of the last generation,
+        empty unless the generator is created with profile=True
+
+        Returns
+        -------
+        dict
+            timers, counters and cycles, see `GenerationProfile.to_dict`
+        """
+        return self.profile.to_dict()
+
+    def split_fibers(self, fibers: np.ndarray) -> np.ndarray:
+        """split the fibers crossing the boundary of the RVE into their
+        periodic partitions
+
+        Parameters
+        ----------
+        fibers : np.ndarray
+            fibers with the center inside the RVE, one row per fiber
+
+        Returns
+        -------
+        np.ndarray
+            fiber positions, one row per partition
+
+        Raises
+        ------
+        NotImplementedError
+            error report
+        """
+
+        raise NotImplementedError("Should be implemented in sub-class \n")
+
+    def generate_microstructure(
+        self,
+        seed: Any = None,
+        time_budget: Optional[float] = None,
+        trial_budget: Optional[int] = None,
+    ) -> GenerationResult:
         """generating micro-structure
 
         Parameters
         ----------
         seed : any, optional
             seed generator or number , by default None
+        time_budget : float, optional
+            wall-clock budget in seconds, the best microstructure so far is
+            kept when it is exceeded, by default None (no budget)
+        trial_budget : int, optional
+            budget of trials over all cycles, by default None (no budget)
+
+        Returns
+        -------
+        GenerationResult
+            summary of the generation
         """
 
         raise NotImplementedError("Should be implemented in sub-class \n")
 
+    def _start_budget(
+        self, time_budget: Optional[float], trial_budget: Optional[int]
+    ) -> None:
+        """start the clock, the trial counters and the profile of a
+        generation
+
+        Parameters
+        ----------
+        time_budget : float, optional
+            wall-clock budget in seconds
+        trial_budget : int, optional
+            budget of trials over all cycles
+        """
+        self.time_budget = time_budget
+        self.trial_budget = trial_budget
+        self.start_time = time.time()
+        self.num_trials = 0
+        self.num_accepted = 0
+        self.stop_reason = None
+        self.profile.reset()
+
+    def _budget_exhausted(self) -> bool:
+        """check the time and trial budget, the reason is recorded in
+        `stop_reason`
+
+        Returns
+        -------
+        bool
+            True if one of the budgets is used up
+        """
+        if self.stop_reason is not None:
+            return True
+        if (
+            self.time_budget is not None
+            and time.time() - self.start_time >= self.time_budget
+        ):
+            self.stop_reason = "time_budget"
+        elif self.trial_budget is not None and self.num_trials >= self.trial_budget:
+            self.stop_reason = "trial_budget"
+        return self.stop_reason is not None
+
+    def _initial_fibers(self, initial_fibers: np.ndarray) -> np.ndarray:
+        """fibers of a warm start, one row per fiber with the center inside
+        the RVE. Only the first fibers that reach `vol_req` are kept, such
+        that a warm start from a denser packing gives a sparser one
+
+        Parameters
+        ----------
+        initial_fibers : np.ndarray
+            fibers of an existing packing of the same RVE, either as
+            `fiber_positions` (one row per partition, the partitions of a
+            fiber are consecutive rows) or as one row per fiber without the
+            partition column
+
+        Returns
+        -------
+        np.ndarray
+            fibers [x, y, (z), r] in the order of `initial_fibers`
+
+        Raises
+        ------
+        ValueError
+            if there are no fibers or the number of columns does not fit
+            the RVE
+        """
+        dim = self.box.shape[0]
+        fibers = np.asarray(initial_fibers, dtype=float)
+        if fibers.size == 0:
+            raise ValueError(
+                "initial fibers should contain at least one fiber, use "
+                "initial_fibers=None for a cold start \n"
+            )
+        if fibers.ndim != 2 or fibers.shape[1] not in (dim + 1, dim + 2):
+            raise ValueError(
+                f"initial fibers should have {dim + 1} or {dim + 2} columns \n"
+            )
+        if fibers.shape[1] == dim + 2:
+            fibers = merge_partitions(fibers, self.box)
+        else:
+            fibers = fibers.copy()
+            fibers[:, 0:dim] = np.mod(fibers[:, 0:dim], self.box)
+        vol_frac = np.cumsum(self.fiber_volume(fibers[:, dim])) / self.vol_total
+        num_fibers = int(np.searchsorted(vol_frac, self.vol_req)) + 1
+
+        return fibers[:num_fibers]
+
+    def _sample_radii(self, vol_missing: float) -> np.ndarray:
+        """pre-sample the radii of the fibers needed to fill a volume
+        fraction, used by the largest-first insertion
+
+        Parameters
+        ----------
+        vol_missing : float
+            volume fraction to be filled
+
+        Returns
+        -------
+        np.ndarray
+            radii in descending order, at least one radius
+        """
+        radius = []
+        vol_frac = 0.0
+        while vol_frac < vol_missing or not radius:
+            r = self.rng.normal(self.radius_mu, self.radius_std)
+            if r <= 0:
+                continue
+            radius.append(r)
+            vol_frac = vol_frac + self.fiber_volume(r) / self.vol_total
+
+        return np.sort(radius)[::-1]
+
+    def _trial_radius(self) -> Tuple[float, float]:
+        """mean and standard deviation of the radius of the next trial
+        fiber. The largest-first insertion uses the largest pre-sampled
+        radius that is not inserted yet, a radius is skipped after
+        `radius_trials_max` failed trials such that a radius that does not
+        fit does not block the queue. The population is sampled again for
+        the missing volume when it is used up
+
+        Returns
+        -------
+        Tuple[float, float]
+            mean and standard deviation of the radius
+        """
+        if self.insertion != "largest_first":
+            return self.radius_mu, self.radius_std
+        if self.radius_next != self.radius_queued:
+            # the previous radius is inserted
+            self.radius_queued = self.radius_next
+            self.radius_trials_start = self.num_trials
+        elif self.num_trials - self.radius_trials_start >= self.radius_trials_max:
+            self.radius_next = self.radius_next + 1
+            self.radius_queued = self.radius_next
+            self.radius_trials_start = self.num_trials
+        if self.radius_next >= self.radius_queue.shape[0]:
+            self.radius_queue = self._sample_radii(self.vol_req - self.vol_frac)
+            self.radius_next = 0
+            self.radius_queued = 0
+            self.radius_trials_start = self.num_trials
+        return float(self.radius_queue[self.radius_next]), 0.0
+
+    def _start_snapshots(self, snapshot_fractions: Optional[List[float]]) -> None:
+        """set the volume fractions at which the fibers are copied during
+        the generation
+
+        Parameters
+        ----------
+        snapshot_fractions : List[float], optional
+            volume fractions of the snapshots
+        """
+        self.snapshots: Dict[float, np.ndarray] = {}
+        self._snapshot_fractions = sorted(snapshot_fractions or [])
+
+    def _take_snapshots(self) -> None:
+        """copy the fibers for every snapshot fraction reached since the
+        last call, called whenever the volume fraction has grown"""
+        if not self._snapshot_fractions or self.vol_frac < self._snapshot_fractions[0]:
+            return
+        fibers = self.fiber_store.to_array()
+        while self._snapshot_fractions and self.vol_frac >= self._snapshot_fractions[0]:
+            self.snapshots[self._snapshot_fractions.pop(0)] = fibers
+
+    def snapshot_positions(self, vol_frac: float) -> np.ndarray:
+        """fiber positions of a snapshot, in the same format as
+        `fiber_positions`
+
+        Parameters
+        ----------
+        vol_frac : float
+            volume fraction of the snapshot, one of the snapshot fractions
+            passed to `generate_microstructure`
+
+        Returns
+        -------
+        np.ndarray
+            fiber positions, one row per partition
+        """
+        with self.profile.timer("periodic_images"):
+            return self.split_fibers(self.snapshots[vol_frac])
+
+    def _generation_result(self, stop_reason: str) -> GenerationResult:
+        """summary of the finished generation
+
+        Parameters
+        ----------
+        stop_reason : str
+            reason the generation stopped if no budget was exhausted
+
+        Returns
+        -------
+        GenerationResult
+            summary of the generation
+        """
+        if self.stop_reason is None:
+            self.stop_reason = "vol_req" if self.vol_frac >= self.vol_req else stop_reason
+        self.result = GenerationResult(
+            vol_req=self.vol_req,
+            vol_frac=float(self.vol_frac),
+            num_fibers=int(self.num_fibers),
+            num_trials=int(self.num_trials),
+            num_accepted=int(self.num_accepted),
+            num_cycles=int(self.num_cycle),
+            time_usage=self.time_usage,
+            stop_reason=self.stop_reason,
+        )
+        self.profile.finish(**asdict(self.result))
+        return self.result
+
     def plot_microstructure(
         self, save_figure: bool = False, fig_name: str = "RVE.png"
     ) -> None:
@@ -79,6 +411,85 @@ class MicrostructureGenerator:
 
         np.save(file_name, self.rgmsh.T)
 
+    def to_phase_map(
+        self, file_name: str = "microstructure.pmap", run_length: bool = False
+    ) -> None:
+        """save the binary discrete microstructure with 1 bit per voxel (or
+        run-length encoded), in the same orientation as `to_crate_format`
+
+        Parameters
+        ----------
+        file_name : str, optional
+            file name, by default "microstructure.pmap"
+        run_length : bool, optional
+            run-length encode the slabs, by default False
+        """
+
+        PhaseMap.write(file_name, self.rgmsh.T, run_length=run_length)
+
+    @staticmethod
+    def read_phase_map(file_name: str = "microstructure.pmap") -> PhaseMap:
+        """open a phase map saved by `to_phase_map`, the voxels are only
+        decoded when the map is indexed
+
+        Parameters
+        ----------
+        file_name : str, optional
+            file name, by default "microstructure.pmap"
+
+        Returns
+        -------
+        PhaseMap
+            memory mapped phase map
+        """
+
+        return PhaseMap(file_name)
+
+    def two_point_correlation(self) -> np.ndarray:
+        """periodic two-point correlation of the discrete microstructure
+        created by `crate_rgmsh`, in the same orientation as
+        `to_crate_format`
+
+        Returns
+        -------
+        np.ndarray
+            two-point correlation, the zero offset is at index 0
+        """
+
+        return two_point_correlation(self.rgmsh.T)
+
+    def nearest_neighbour_distances(self) -> np.ndarray:
+        """distance of every fiber center to the closest other center, with
+        the minimum image convention
+
+        Returns
+        -------
+        np.ndarray
+            nearest neighbour distance of every fiber
+        """
+
+        fibers = self.fiber_store.to_array()
+        return nearest_neighbour_distances(
+            fibers[:, 0: self.box.shape[0]], self.box
+        )
+
+    def ripley_k(self, radii: np.ndarray) -> np.ndarray:
+        """Ripley's K function of the fiber centers in the periodic RVE
+
+        Parameters
+        ----------
+        radii : np.ndarray
+            radii at which K is evaluated
+
+        Returns
+        -------
+        np.ndarray
+            K at every radius
+        """
+
+        fibers = self.fiber_store.to_array()
+        return ripley_k(fibers[:, 0: self.box.shape[0]], self.box, radii)
+
     def rgmsh_plot(
         self,
         save_fig: bool = False,
@@ -94,7 +505,8 @@ class MicrostructureGenerator:
         fig_name : str, optional
             figure name, by default "rgmsh.png"
         """
-        if self.fiber_positions.shape[1] == 4:
+        fiber_positions = self.fiber_positions
+        if fiber_positions.shape[1] == 4:
             fig = plt.figure(**kwarg)
             ax = fig.add_subplot(111)
             _ = ax.imshow(
@@ -109,7 +521,7 @@ class MicrostructureGenerator:
                 plt.savefig(fig_name, dpi=300)
                 plt.close()
             plt.show()
-        elif self.fiber_positions.shape[1] == 5:
+        elif fiber_positions.shape[1] == 5:
             fig = plt.figure(**kwarg)
             ax = fig.add_subplot(projection="3d")
             ax.voxels(self.rgmsh.T, facecolors="#EE3377")
@@ -0,0 +1,324 @@
+"""
+Neighbour search structures for the microstructure generators.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# standard
+import itertools
+import math
+from typing import Dict, List, Sequence, Tuple
+
+# Third party
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+
+class PeriodicCellList:
+    """Uniform grid (cell list) over a periodic box
+
+    Every stored point is hashed into the cell that contains its position
+    wrapped back into the box. A query for all points within a distance
+    ``radius`` only visits the block of cells around the query point, so
+    the cost of a query does not grow with the number of stored points.
+    The returned ids are a superset of the points within ``radius``
+    (measured with the minimum image convention); the exact distance check
+    is left to the caller.
+
+    Parameters
+    ----------
+    box : Sequence[float]
+        size of the periodic box along every axis, e.g. (length, width)
+    cell_size : float
+        requested edge length of a cell, the actual edge length is
+        stretched such that an integer number of cells fits in the box
+    """
+
+    def __init__(self, box: Sequence[float], cell_size: float) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        box : Sequence[float]
+            size of the periodic box along every axis
+        cell_size : float
+            requested edge length of a cell
+        """
+        self.box = np.asarray(box, dtype=float)
+        self.num_cells = np.maximum(
+            np.floor(self.box / cell_size).astype(int), 1
+        )
+        self.cell_size = self.box / self.num_cells
+        self.dim = self.box.shape[0]
+        # flat cell id = sum(index * stride)
+        self._strides = np.cumprod(
+            np.concatenate(([1], self.num_cells[:-1]))
+        ).astype(int)
+        # python copies of the grid for the scalar hot path
+        self._box = self.box.tolist()
+        self._size = self.cell_size.tolist()
+        self._num = self.num_cells.tolist()
+        self._stride = self._strides.tolist()
+        self._cells: List[List[int]] = [
+            [] for _ in range(int(np.prod(self.num_cells)))
+        ]
+        self._id_cell: Dict[int, int] = {}
+        self._blocks: Dict[Tuple[int, ...], np.ndarray] = {}
+        # flat ids of the cells around a cell, per (cell, reach)
+        self._block_cells: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._id_cell)
+
+    def cell_of(self, point: np.ndarray) -> int:
+        """flat index of the cell containing a point
+
+        Parameters
+        ----------
+        point : np.ndarray
+            coordinate of the point, it can lay outside of the box
+
+        Returns
+        -------
+        int
+            flat index of the cell containing the wrapped point
+        """
+        cell = 0
+        for axis in range(self.dim):
+            # the modulo of the cell index guards against round-off of
+            # tiny negative coordinates
+            index = int((float(point[axis]) % self._box[axis]) // self._size[axis])
+            cell += (index % self._num[axis]) * self._stride[axis]
+        return cell
+
+    def insert(self, idx: int, point: np.ndarray) -> None:
+        """add a point to the cell list
+
+        Parameters
+        ----------
+        idx : int
+            id of the point
+        point : np.ndarray
+            coordinate of the point
+        """
+        cell = self.cell_of(point)
+        self._cells[cell].append(idx)
+        self._id_cell[idx] = cell
+
+    def remove(self, idx: int) -> None:
+        """remove a point from the cell list
+
+        Parameters
+        ----------
+        idx : int
+            id of the point
+        """
+        cell = self._id_cell.pop(idx)
+        self._cells[cell].remove(idx)
+
+    def move(self, idx: int, point: np.ndarray) -> None:
+        """update the position of a stored point in place
+
+        Parameters
+        ----------
+        idx : int
+            id of the point
+        point : np.ndarray
+            new coordinate of the point
+        """
+        cell = self.cell_of(point)
+        if self._id_cell.get(idx) == cell:
+            return
+        self.remove(idx)
+        self._cells[cell].append(idx)
+        self._id_cell[idx] = cell
+
+    def rebuild(self, points: np.ndarray) -> None:
+        """rebuild the cell list, the row index is used as id
+
+        Parameters
+        ----------
+        points : np.ndarray
+            coordinates of all points, one row per point
+        """
+        for members in self._cells:
+            members.clear()
+        self._id_cell = {}
+        points = np.asarray(points, dtype=float).reshape((-1, self.dim))
+        index = np.floor(np.mod(points, self.box) / self.cell_size)
+        index = np.mod(index.astype(int), self.num_cells)
+        for idx, cell in enumerate((index @ self._strides).tolist()):
+            self._cells[cell].append(idx)
+            self._id_cell[idx] = cell
+
+    def _block(self, reach: Tuple[int, ...]) -> np.ndarray:
+        """cell index offsets of a block of cells, cached per reach
+
+        Parameters
+        ----------
+        reach : Tuple[int, ...]
+            number of neighbouring cells along every axis
+
+        Returns
+        -------
+        np.ndarray
+            offsets of the block, one row per cell
+        """
+        if reach not in self._blocks:
+            ranges = []
+            for axis in range(self.dim):
+                if 2 * reach[axis] + 1 >= self._num[axis]:
+                    # the block wraps around, visit every cell once
+                    ranges.append(range(self._num[axis]))
+                else:
+                    ranges.append(range(-reach[axis], reach[axis] + 1))
+            self._blocks[reach] = np.array(
+                list(itertools.product(*ranges)), dtype=int
+            )
+        return self._blocks[reach]
+
+    def neighbours(self, point: np.ndarray, radius: float) -> np.ndarray:
+        """ids of the points in the cells around a query point
+
+        Parameters
+        ----------
+        point : np.ndarray
+            coordinate of the query point
+        radius : float
+            search radius
+
+        Returns
+        -------
+        np.ndarray
+            ids of all stored points whose (periodic) distance to the query
+            point can be smaller than the search radius
+        """
+        return np.asarray(self.neighbour_list(point, radius), dtype=int)
+
+    def neighbour_list(self, point: Sequence[float], radius: float) -> List[int]:
+        """ids of the points in the cells around a query point as a list,
+        the flat ids of the visited cells are cached per cell and reach such
+        that a query does not call numpy. Used by the scalar hot paths of
+        the generators
+
+        Parameters
+        ----------
+        point : Sequence[float]
+            coordinate of the query point
+        radius : float
+            search radius
+
+        Returns
+        -------
+        List[int]
+            ids of all stored points whose (periodic) distance to the query
+            point can be smaller than the search radius
+        """
+        centre = tuple(
+            int((float(point[axis]) % self._box[axis]) // self._size[axis])
+            % self._num[axis]
+            for axis in range(self.dim)
+        )
+        reach = tuple(
+            int(math.ceil(radius / self._size[axis])) for axis in range(self.dim)
+        )
+        cells = self._block_cells.get((centre, reach))
+        if cells is None:
+            cells = (
+                np.mod(self._block(reach) + centre, self.num_cells) @ self._strides
+            ).tolist()
+            self._block_cells[(centre, reach)] = cells
+        members = self._cells
+        return [idx for cell in cells for idx in members[cell]]
+
+    def covers_box(self, radius: float) -> bool:
+        """check if a query with this radius visits every cell
+
+        Parameters
+        ----------
+        radius : float
+            search radius
+
+        Returns
+        -------
+        bool
+            True if the whole box is searched
+        """
+        return all(
+            2 * int(math.ceil(radius / self._size[axis])) + 1 >= self._num[axis]
+            for axis in range(self.dim)
+        )
+
+
+def minimum_image(delta: np.ndarray, box: np.ndarray) -> np.ndarray:
+    """wrap difference vectors to their shortest periodic image
+
+    Parameters
+    ----------
+    delta : np.ndarray
+        difference vectors, the last axis holds the coordinates
+    box : np.ndarray
+        size of the periodic box along every axis
+
+    Returns
+    -------
+    np.ndarray
+        difference vectors to the closest periodic image
+    """
+    return delta - box * np.round(delta / box)
+
+
+def periodic_k_nearest(
+    points: np.ndarray, box: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """k nearest neighbours of every point in a periodic box, computed
+    with one batched query of a kd-tree
+
+    Parameters
+    ----------
+    points : np.ndarray
+        coordinates of all points, one row per point
+    box : np.ndarray
+        size of the periodic box along every axis
+    k : int
+        number of neighbours
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        distances and ids of the k nearest neighbours (the point itself
+        excluded), ordered by distance. Missing neighbours have an infinite
+        distance and id ``len(points)``. Both are None if the kd-tree of
+        SciPy is not available
+    """
+    if cKDTree is None:
+        return None, None
+    # the kd-tree requires coordinates in [0, box)
+    points = np.mod(points, box)
+    points = np.where(points >= box, points - box, points)
+    tree = cKDTree(points, boxsize=box)
+    dis, index = tree.query(points, k=k + 1)
+    dis = dis.reshape((points.shape[0], k + 1))
+    index = index.reshape((points.shape[0], k + 1))
+    # drop the point itself, it is not always the first hit for points at
+    # the same location
+    order = np.argsort(
+        index == np.arange(points.shape[0])[:, np.newaxis], axis=1, kind="stable"
+    )[:, :k]
+    return (
+        np.take_along_axis(dis, order, axis=1),
+        np.take_along_axis(index, order, axis=1),
+    )
@@ -0,0 +1,247 @@
+"""
+Compact storage of binary phase maps with lazy slice decoding.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# standard
+import json
+import math
+import struct
+from typing import Any, Tuple
+
+# Third party
+import numpy as np
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+# file layout: magic, header length (uint64), json header, padding to a
+# multiple of 8 bytes, payload
+MAGIC = b"PHASEMAP"
+
+
+class PhaseMap:
+    """binary phase map stored with 1 bit per voxel or run-length encoded
+
+    The map is split into slabs along the first axis. With the "bits"
+    encoding every row along the last axis is packed with `np.packbits`
+    and padded to whole bytes, with the "rle" encoding every slab is stored
+    as the lengths of alternating runs of 0 and 1 (starting with 0). The
+    payload is memory mapped, indexing decodes only the slabs that are
+    selected along the first axis, e.g. ``phase_map[10]`` or
+    ``phase_map[10:20, :, 5]``.
+
+    Parameters
+    ----------
+    file_name : str
+        phase map file written by `PhaseMap.write`
+    """
+
+    def __init__(self, file_name: str) -> None:
+        """open a phase map file, only the header is read
+
+        Parameters
+        ----------
+        file_name : str
+            phase map file written by `PhaseMap.write`
+
+        Raises
+        ------
+        ValueError
+            if the file is not a phase map
+        """
+        with open(file_name, "rb") as fp:
+            if fp.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{file_name} is not a phase map file \n")
+            (header_length,) = struct.unpack("<Q", fp.read(8))
+            header = json.loads(fp.read(header_length).decode())
+        self.file_name = file_name
+        self.shape: Tuple[int, ...] = tuple(header["shape"])
+        self.encoding: str = header["encoding"]
+        offset = self._payload_offset(header_length)
+        if self.encoding == "bits":
+            self._payload = np.memmap(
+                file_name, dtype=np.uint8, mode="r", offset=offset
+            )
+        else:
+            num_slabs = self.shape[0]
+            self._offsets = np.memmap(
+                file_name, dtype="<i8", mode="r", offset=offset,
+                shape=(num_slabs + 1,),
+            )
+            self._payload = np.memmap(
+                file_name, dtype="<u4", mode="r",
+                offset=offset + 8 * (num_slabs + 1),
+            )
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        """size of the encoded map in bytes"""
+        if self.encoding == "bits":
+            return self._payload.nbytes
+        return self._offsets.nbytes + self._payload.nbytes
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, index: Any) -> np.ndarray:
+        if not isinstance(index, tuple):
+            index = (index,)
+        first, rest = (index[0], index[1:]) if index else (slice(None), ())
+        if isinstance(first, (int, np.integer)):
+            slab = range(self.shape[0])[first]
+            return self._decode(slab, slab + 1)[0][rest]
+        if isinstance(first, slice):
+            slabs = range(self.shape[0])[first]
+            if len(slabs) == 0:
+                return np.zeros((0,) + self.shape[1:], dtype=np.uint8)[rest]
+            start, stop = min(slabs[0], slabs[-1]), max(slabs[0], slabs[-1]) + 1
+            decoded = self._decode(start, stop)
+            return decoded[[slab - start for slab in slabs]][(slice(None),) + rest]
+        # advanced indexing along the first axis
+        return self.to_array()[index]
+
+    def to_array(self) -> np.ndarray:
+        """decode the complete phase map
+
+        Returns
+        -------
+        np.ndarray
+            uint8 phase map (1: particle, 0: matrix)
+        """
+        return self._decode(0, self.shape[0])
+
+    def _decode(self, start: int, stop: int) -> np.ndarray:
+        """decode a range of slabs along the first axis
+
+        Parameters
+        ----------
+        start : int
+            first slab
+        stop : int
+            slab after the last slab
+
+        Returns
+        -------
+        np.ndarray
+            uint8 phase map of the slabs
+        """
+        slab_shape = self.shape[1:]
+        if self.encoding == "bits":
+            row_bytes = math.ceil(self.shape[-1] / 8)
+            slab_bytes = int(np.prod(slab_shape[:-1], dtype=np.int64)) * row_bytes
+            packed = np.asarray(
+                self._payload[start * slab_bytes: stop * slab_bytes]
+            ).reshape((stop - start,) + slab_shape[:-1] + (row_bytes,))
+            return np.unpackbits(packed, axis=-1, count=self.shape[-1])
+
+        runs = np.asarray(self._payload[self._offsets[start]: self._offsets[stop]])
+        # the runs of every slab start with a run of 0
+        values = np.zeros(runs.shape[0], dtype=np.uint8)
+        local = np.arange(runs.shape[0]) - np.repeat(
+            np.asarray(self._offsets[start:stop]) - self._offsets[start],
+            np.diff(np.asarray(self._offsets[start: stop + 1])),
+        )
+        values[local % 2 == 1] = 1
+        return np.repeat(values, runs).reshape((stop - start,) + slab_shape)
+
+    @staticmethod
+    def _payload_offset(header_length: int) -> int:
+        """offset of the payload, aligned to 8 bytes
+
+        Parameters
+        ----------
+        header_length : int
+            length of the json header in bytes
+
+        Returns
+        -------
+        int
+            offset in bytes
+        """
+        return 8 * math.ceil((len(MAGIC) + 8 + header_length) / 8)
+
+    @staticmethod
+    def write(
+        file_name: str, phase_map: np.ndarray, run_length: bool = False
+    ) -> None:
+        """write a binary phase map
+
+        Parameters
+        ----------
+        file_name : str
+            name of the file
+        phase_map : np.ndarray
+            phase map with at least 2 dimensions and only the values 0 and 1
+        run_length : bool, optional
+            run-length encode the slabs instead of storing 1 bit per voxel,
+            smaller for maps with large connected regions, by default False
+
+        Raises
+        ------
+        ValueError
+            if the phase map is not binary or has less than 2 dimensions
+        """
+        phase_map = np.asarray(phase_map)
+        if phase_map.ndim < 2:
+            raise ValueError("phase map should have at least 2 dimensions \n")
+        if not np.isin(phase_map, (0, 1)).all():
+            raise ValueError("phase map should only contain 0 and 1 \n")
+        binary = phase_map.astype(np.uint8)
+
+        header = json.dumps(
+            {
+                "shape": list(phase_map.shape),
+                "encoding": "rle" if run_length else "bits",
+            }
+        ).encode()
+        padding = PhaseMap._payload_offset(len(header)) - (
+            len(MAGIC) + 8 + len(header)
+        )
+        with open(file_name, "wb") as fp:
+            fp.write(MAGIC)
+            fp.write(struct.pack("<Q", len(header)))
+            fp.write(header)
+            fp.write(b"\0" * padding)
+            if not run_length:
+                fp.write(np.packbits(binary, axis=-1).tobytes())
+                return
+            slabs = binary.reshape((binary.shape[0], -1))
+            runs = [PhaseMap._runs(slab) for slab in slabs]
+            offsets = np.zeros(len(runs) + 1, dtype="<i8")
+            offsets[1:] = np.cumsum([run.shape[0] for run in runs])
+            fp.write(offsets.tobytes())
+            for run in runs:
+                fp.write(run.astype("<u4").tobytes())
+
+    @staticmethod
+    def _runs(values: np.ndarray) -> np.ndarray:
+        """lengths of the alternating runs of 0 and 1, starting with 0
+
+        Parameters
+        ----------
+        values : np.ndarray
+            flat binary array
+
+        Returns
+        -------
+        np.ndarray
+            run lengths, the first run is empty if values starts with 1
+        """
+        changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+        bounds = np.concatenate(([0], changes, [values.shape[0]]))
+        runs = np.diff(bounds)
+        if values.shape[0] > 0 and values[0] == 1:
+            runs = np.concatenate(([0], runs))
+        return runs
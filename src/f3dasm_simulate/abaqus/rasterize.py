@@ -0,0 +1,175 @@
+"""
+Rasterization of particle microstructures onto regular grids.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# Third party
+import numpy as np
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+
+def rasterize_particles(
+    centers: np.ndarray,
+    radius: np.ndarray,
+    box: np.ndarray,
+    num_discrete: int,
+    periodic: bool = True,
+    partial_volume: bool = False,
+    chunk_size: int = 2**20,
+) -> np.ndarray:
+    """rasterize disks (2d) or spheres (3d) onto a regular grid
+
+    Every particle is stamped onto the cells of its bounding box. The
+    particles are grouped by the size of their bounding box and processed
+    in chunks such that at most `chunk_size` cells are evaluated at once,
+    the bounding box of a single particle is split if it has more cells
+    than `chunk_size`.
+
+    Parameters
+    ----------
+    centers : np.ndarray
+        centers of the particles, one row per particle
+    radius : np.ndarray
+        radius of the particles
+    box : np.ndarray
+        size of the RVE along every axis
+    num_discrete : int
+        number of cells along every axis
+    periodic : bool, optional
+        wrap the particles crossing the boundary to the opposite side of the
+        RVE, by default True
+    partial_volume : bool, optional
+        return the phase fraction of the particles in every cell instead of
+        a binary phase map, by default False
+    chunk_size : int, optional
+        maximum number of cells evaluated at once, by default 2**20
+
+    Returns
+    -------
+    np.ndarray
+        grid indexed as [x, y, (z)], uint8 phase map (1: particle, 0:
+        matrix) or float32 phase fractions if `partial_volume` is True
+    """
+    centers = np.asarray(centers, dtype=float)
+    radius = np.asarray(radius, dtype=float).reshape(-1)
+    box = np.asarray(box, dtype=float)
+    dim = box.shape[0]
+    shape = (num_discrete,) * dim
+    grid_size = box / num_discrete
+    if partial_volume:
+        grid = np.zeros(int(np.prod(shape)), dtype=np.float32)
+    else:
+        grid = np.zeros(int(np.prod(shape)), dtype=np.uint8)
+    if centers.shape[0] == 0:
+        return grid.reshape(shape)
+
+    # the fraction ramps from 0 to 1 over one cell across the boundary of
+    # the particle (signed distance anti-aliasing)
+    ramp = 0.5 * grid_size.min() if partial_volume else 0.0
+    # first cell and number of cells per axis of the bounding box of every
+    # particle
+    start = np.floor((centers - (radius + ramp)[:, np.newaxis]) / grid_size).astype(int)
+    widths = np.ceil(2 * (radius + ramp) / grid_size.min()).astype(int) + 2
+    strides = np.array([num_discrete**axis for axis in range(dim)], dtype=int)
+
+    for width in np.unique(widths).tolist():
+        members = np.flatnonzero(widths == width)
+        num_offsets = width**dim
+        # particles per chunk, or cells of the bounding box per chunk if a
+        # single bounding box exceeds the chunk size
+        num_chunk = max(1, chunk_size // num_offsets)
+        num_offset_chunk = min(num_offsets, max(1, chunk_size))
+        for first in range(0, members.shape[0], num_chunk):
+            particles = members[first: first + num_chunk]
+            for offset_first in range(0, num_offsets, num_offset_chunk):
+                # cell offsets of this part of the bounding box
+                offsets = np.stack(
+                    np.unravel_index(
+                        np.arange(
+                            offset_first,
+                            min(offset_first + num_offset_chunk, num_offsets),
+                        ),
+                        (width,) * dim,
+                    ),
+                    axis=1,
+                )
+                _stamp(
+                    grid=grid,
+                    centers=centers[particles],
+                    radius=radius[particles],
+                    index=start[particles, np.newaxis, :] + offsets[np.newaxis, :, :],
+                    grid_size=grid_size,
+                    strides=strides,
+                    num_discrete=num_discrete,
+                    periodic=periodic,
+                    ramp=ramp,
+                )
+
+    if partial_volume:
+        np.clip(grid, 0.0, 1.0, out=grid)
+    # flat index = ix + iy * n + iz * n**2, reshape to [x, y, (z)]
+    return grid.reshape(shape[::-1]).transpose()
+
+
+def _stamp(
+    grid: np.ndarray,
+    centers: np.ndarray,
+    radius: np.ndarray,
+    index: np.ndarray,
+    grid_size: np.ndarray,
+    strides: np.ndarray,
+    num_discrete: int,
+    periodic: bool,
+    ramp: float,
+) -> None:
+    """stamp a chunk of particles onto cells of their bounding boxes
+
+    Parameters
+    ----------
+    grid : np.ndarray
+        flat grid, updated in place
+    centers : np.ndarray
+        centers of the particles of the chunk
+    radius : np.ndarray
+        radius of the particles of the chunk
+    index : np.ndarray
+        cell indices to evaluate (num_particles, num_cells, dim)
+    grid_size : np.ndarray
+        size of a cell along every axis
+    strides : np.ndarray
+        strides of the flat grid
+    num_discrete : int
+        number of cells along every axis
+    periodic : bool
+        wrap the cells outside of the RVE to the opposite side
+    ramp : float
+        half width of the anti-aliasing ramp, 0 for a binary phase map
+    """
+    cell_centers = (index + 0.5) * grid_size
+    points_dis = np.linalg.norm(cell_centers - centers[:, np.newaxis, :], axis=2)
+    signed_dis = radius[:, np.newaxis] - points_dis
+    if ramp > 0:
+        inside = signed_dis > -ramp
+    else:
+        inside = signed_dis > 0
+    if periodic:
+        index = np.mod(index, num_discrete)
+    else:
+        inside &= np.all((index >= 0) & (index < num_discrete), axis=2)
+    flat = index[inside] @ strides
+    if ramp > 0:
+        fraction = np.clip(
+            0.5 + signed_dis[inside] / (2 * ramp), 0.0, 1.0
+        ).astype(np.float32)
+        np.add.at(grid, flat, fraction)
+    else:
+        grid[flat] = 1
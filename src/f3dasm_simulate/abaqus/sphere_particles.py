@@ -4,14 +4,22 @@
 import json
 import math
 import time
-from typing import Tuple
+from typing import List, Tuple
 
 # third-party
 import numpy as np
 from scipy.spatial import distance_matrix
 
 # local functions
-from .microstructure_generator import MicrostructureGenerator
+from .fiber_store import FiberStore
+from .generation_profile import GenerationProfile
+from .microstructure_generator import GenerationResult, MicrostructureGenerator
+from .neighbour_search import (
+    PeriodicCellList,
+    minimum_image,
+    periodic_k_nearest,
+)
+from .rasterize import rasterize_particles
 
 #                                                          Authorship & Credits
 # =============================================================================
@@ -32,6 +40,11 @@ class SphereParticles(MicrostructureGenerator):
         parent class of microstructure generator
     """
 
+    # version of the packing algorithm, it is part of the key of cached
+    # microstructures and should be increased when the generated packings
+    # change
+    version = "2"
+
     def __init__(
         self,
         length: float,
@@ -44,6 +57,11 @@ class SphereParticles(MicrostructureGenerator):
         num_fiber_max: int = 750,
         num_cycle_max: int = 15,
         dist_min_factor: float = 1.1,
+        neighbour_tree: bool = False,
+        insertion: str = "random",
+        radius_trials_max: int = 1000,
+        profile: bool = False,
+        trace_file: str = None,
     ) -> None:
         """Initialization
 
@@ -69,6 +87,28 @@ class SphereParticles(MicrostructureGenerator):
             iteration cycles, by default 15
         dist_min_factor : float, optional
             distance factor, by default 2.07
+        neighbour_tree : bool, optional
+            find the nearest neighbours of the stirring stage with one
+            periodic kd-tree query per cycle instead of one search per
+            sphere, by default False
+        insertion : str, optional
+            insertion strategy of the random generation stage, "random"
+            draws the radius of every trial sphere, "largest_first"
+            pre-samples the radii needed for `vol_req` and inserts them in
+            descending order, which wastes fewer trials on large spheres
+            late in the run if radius_std > 0, by default "random"
+        radius_trials_max : int, optional
+            number of failed trials after which the largest-first insertion
+            skips a pre-sampled radius that does not fit in the packing,
+            its volume is sampled again when the queue is used up, by
+            default 1000
+        profile : bool, optional
+            record counters and timers of the generation phases and the
+            acceptance rate of every cycle in `profile_info`, by default
+            False
+        trace_file : str, optional
+            JSONL file the profile of every cycle and generation is
+            appended to when `profile` is True, by default None
         """
         # geometry information of the 2D RVE with homogeneous circles
         self.length = length
@@ -84,6 +124,14 @@ class SphereParticles(MicrostructureGenerator):
         self.num_guess_max = num_guess_max
         self.num_fibers_max = num_fiber_max
         self.num_cycles_max = num_cycle_max
+        self.neighbour_tree = neighbour_tree
+        if insertion not in ("random", "largest_first"):
+            raise ValueError(
+                f"insertion should be 'random' or 'largest_first', got {insertion} \n"
+            )
+        self.insertion = insertion
+        self.radius_trials_max = radius_trials_max
+        self.profile = GenerationProfile(enabled=profile, trace_file=trace_file)
 
     def _parameter_initialization(self) -> None:
         """Initialize the parameters"""
@@ -92,6 +140,7 @@ class SphereParticles(MicrostructureGenerator):
         self.vol_frac = 0
         # Total volume of image
         self.vol_total = self.length * self.width * self.height
+        self.box = np.array([self.length, self.width, self.height])
 
         # initial coordinate for position of fibre
         self.len_start = -1 * self.radius_mu
@@ -103,21 +152,70 @@ class SphereParticles(MicrostructureGenerator):
 
         # some import variables
         # fiber location is a nx5 numpy array
-        # x, y,z, r, p (partition)
-        self.fiber_positions = None
+        # x, y,z, r, p (partition). During the generation every sphere is
+        # stored as a single row x, y, z, r with the center inside the RVE,
+        # the partitions are only created by `fiber_positions`
+        self.fiber_store = None
+
+    def generate_microstructure(
+        self,
+        seed: any = None,
+        time_budget: float = None,
+        trial_budget: int = None,
+        snapshot_fractions: List[float] = None,
+        initial_fibers: np.ndarray = None,
+    ) -> GenerationResult:
+        """generate the microstructure, the best microstructure so far is
+        kept when a budget is exhausted
 
-    def generate_microstructure(self, seed: any = None) -> None:
+        Parameters
+        ----------
+        seed : any, optional
+            seed generator or number, by default None
+        time_budget : float, optional
+            wall-clock budget in seconds, by default None (no budget)
+        trial_budget : int, optional
+            budget of trials over all cycles, by default None (no budget)
+        snapshot_fractions : List[float], optional
+            volume fractions at which a copy of the fibers (one row per
+            fiber) is stored in `snapshots` while the RVE is filled, such
+            that one run gives a ladder of microstructures up to `vol_req`.
+            A snapshot holds the fibers of a separate run with the same seed
+            and `vol_req` equal to the snapshot fraction at the moment it
+            reaches that fraction, i.e. before its last stirring stage.
+            This does not hold for the largest-first insertion, its radii
+            are pre-sampled for `vol_req`, so the snapshots are not the
+            packings of runs with a lower `vol_req`.
+            Fractions that are not reached have no snapshot, by default None
+        initial_fibers : np.ndarray, optional
+            warm start from the fibers of an existing packing of the same
+            RVE (`fiber_positions` of a previous run or a cached one) instead
+            of a single random fiber. Fibers are added and stirred until
+            `vol_req` is met, only the first fibers that reach `vol_req` are
+            kept if the packing is already denser. The fibers are assumed
+            not to overlap, by default None
+
+        Returns
+        -------
+        GenerationResult
+            reached volume fraction, trials, acceptance rate and cycles
+        """
 
         # decide to use seed or not
         self.rng = np.random.default_rng(seed=seed)
         # counting time generating an RVE
         start_time = time.time()
+        self._start_budget(time_budget=time_budget, trial_budget=trial_budget)
+        self._start_snapshots(snapshot_fractions)
+        self.initial_fibers = initial_fibers
         self._parameter_initialization()
         self._procedure_initialization()
         self._core_iteration()
         end_time = time.time()
         self.time_usage = end_time - start_time
 
+        return self._generation_result(stop_reason="num_cycle_max")
+
     def to_abaqus_format(self, file_name: str = "micro_structure_info.json") -> dict:
 
         microstructure_info = {
@@ -149,178 +247,391 @@ class SphereParticles(MicrostructureGenerator):
         )
 
     def _procedure_initialization(self) -> None:
-        """This function is used to generate the first sphere and
-        assign the initial values of the algorithm
+        """This function is used to generate the first sphere, or to
+        load the fibers of a warm start, and assign the initial values of
+        the algorithm
         """
 
         # initialization (generate the first fiber randomly)
         self.fiber_min_dis_vector = np.zeros(
             (self.num_fibers_max, self.num_cycles_max + 1, 2)
         )
-        self.num_fibers = 1
-        # generate the location of the first fiber
-        # the first fiber is generated with one partition
-        fiber_temp = self.generate_random_fibers(
-            len_start=self.radius_mu,
-            len_end=self.length - self.radius_mu,
-            wid_start=self.radius_mu,
-            wid_end=self.width - self.radius_mu,
-            hei_start=self.radius_mu,
-            hei_end=self.height - self.radius_mu,
-            radius_mu=self.radius_mu,
-            radius_std=0.0,
-            rng=self.rng,
+        self.fiber_store = FiberStore(num_columns=4)
+
+        # periodic cell list used for the overlap and nearest neighbour
+        # queries, the cell size covers two spheres of mean radius. The ids
+        # are the slot ids of the fiber store
+        self.cell_list = PeriodicCellList(
+            box=self.box,
+            cell_size=2 * self.dist_min_factor * self.radius_mu,
         )
-        # update the volume fraction information
-        self.vol_frac = self.fiber_volume(self.radius_mu) / self.vol_total
-        self.fiber_positions = np.zeros((1, 5))
-        self.fiber_positions[0, 0:4] = fiber_temp.T
-        self.fiber_positions[0, 4] = 1
+        if self.insertion == "largest_first" and self.initial_fibers is None:
+            self.radius_queue = self._sample_radii(self.vol_req)
+            self.radius_next = 1
+            radius_first = self.radius_queue[0]
+        else:
+            self.radius_queue = np.zeros(0)
+            self.radius_next = 0
+            radius_first = self.radius_mu
+        # queue position and trial counter at which the current radius of
+        # the largest-first insertion was first tried
+        self.radius_queued, self.radius_trials_start = self.radius_next, 0
+        if self.initial_fibers is None:
+            self.num_fibers = 1
+            # generate the location of the first fiber
+            # the first fiber is generated with one partition
+            fiber_temp = self.generate_random_fibers(
+                len_start=self.radius_mu,
+                len_end=self.length - self.radius_mu,
+                wid_start=self.radius_mu,
+                wid_end=self.width - self.radius_mu,
+                hei_start=self.radius_mu,
+                hei_end=self.height - self.radius_mu,
+                radius_mu=radius_first,
+                radius_std=0.0,
+                rng=self.rng,
+            )
+            # update the volume fraction information
+            self.vol_frac = self.fiber_volume(radius_first) / self.vol_total
+            self.fiber_store.append(fiber_temp.T)
+            self.cell_list.insert(0, fiber_temp[0:3, 0])
+            self.radius_max = radius_first
+        else:
+            fibers = self._initial_fibers(self.initial_fibers)
+            if fibers.shape[0] > self.num_fibers_max:
+                raise ValueError(
+                    "number of initial fibers exceeds num_fiber_max \n"
+                )
+            for fiber in fibers:
+                self.fiber_store.append(fiber.reshape((1, 4)))
+            self.cell_list.rebuild(fibers[:, 0:3])
+            self.num_fibers = fibers.shape[0]
+            self.vol_frac = (
+                self.fiber_volume(fibers[:, 3]).sum() / self.vol_total
+            )
+            self.radius_max = max(self.radius_mu, fibers[:, 3].max())
+        self.knn_dis, self.knn_index = None, None
+        self._take_snapshots()
 
     def _core_iteration(self) -> None:
         """core iteration part of the micro-structure generation method"""
 
         # the main loop of the algorithm
-        while self.vol_frac < self.vol_req and self.num_cycle < self.num_cycles_max:
+        while (
+            self.vol_frac < self.vol_req
+            and self.num_cycle < self.num_cycles_max
+            and not self._budget_exhausted()
+        ):
+            num_trials, num_accepted = self.num_trials, self.num_accepted
+            num_moved = 0
             # ================================================================#
             #                   generate the fibers randomly                  #
             # ================================================================#
-            self.num_trial = 1
-            while (
-                self.num_trial < self.num_guess_max
-                and self.vol_frac < self.vol_req
-                and self.num_fibers < self.num_fibers_max
-            ):
-                # update the info of number trial
-                self.num_trial = self.num_trial + 1
-                fiber_temp = self.generate_random_fibers(
-                    len_start=0.0,
-                    len_end=self.length,
-                    wid_start=0.0,
-                    wid_end=self.width,
-                    hei_start=0.0,
-                    hei_end=self.height,
-                    radius_mu=self.radius_mu,
-                    radius_std=self.radius_std,
-                    rng=self.rng,
-                )
-                # check the location of the fiber and
-                new_fiber = self.new_positions(
-                    x_center=fiber_temp[0, 0],
-                    y_center=fiber_temp[1, 0],
-                    z_center=fiber_temp[2, 0],
-                    radius=fiber_temp[3, 0],
-                    length=self.length,
-                    width=self.width,
-                    height=self.height,
-                )
-                # check the overlap of new fiber
-                overlap_status = self.overlap_check(
-                    new_fiber=new_fiber,
-                    fiber_pos=self.fiber_positions.copy(),
-                    dist_factor=self.dist_min_factor,
-                )
-                if overlap_status == 0:
-                    self.fiber_positions = np.vstack((self.fiber_positions, new_fiber))
-                    self.vol_frac = (
-                        self.vol_frac
-                        + self.fiber_volume(new_fiber[0, 3]) / self.vol_total
-                    )
-                    self.num_fibers = self.num_fibers + new_fiber.shape[0]
-                del new_fiber
+            with self.profile.timer("random_addition"):
+                self._random_addition()
 
             # ================================================================#
             #                   striring the fibers (Firts stage)             #
             # ================================================================#
-            ii = 0
-            if self.fiber_positions.shape[0] < self.num_fibers_max:
-                # for every point, stirring is needed!!!
-                # print('Begin first heuristic stirring \n')
-                while ii < self.fiber_positions.shape[0]:
-                    (
-                        self.fiber_min_dis_vector,
-                        min_index,
-                        min_dis,
-                    ) = self.min_dis_index(
-                        self.fiber_positions[ii, 0:3],
-                        self.fiber_positions.copy(),
-                        self.fiber_min_dis_vector,
-                        ii,
-                        self.num_cycle,
-                    )
-                    new_fiber_temp = self.generate_first_heuristic_fibers(
-                        ref_point=self.fiber_positions[min_index, 0:4].copy(),
-                        fiber_temp=self.fiber_positions[ii, 0:4].copy(),
-                        dist_factor=self.dist_min_factor,
-                        rng=self.rng,
-                    )
-                    new_fiber = self.new_positions(
-                        x_center=new_fiber_temp[0, 0],
-                        y_center=new_fiber_temp[0, 1],
-                        z_center=new_fiber_temp[0, 2],
-                        radius=new_fiber_temp[0, 3],
-                        length=self.length,
-                        width=self.width,
-                        height=self.height,
-                    )
-                    overlap_status = self.overlap_check(
-                        new_fiber=new_fiber,
-                        fiber_pos=self.fiber_positions.copy(),
-                        dist_factor=self.dist_min_factor,
-                        stage="step_two",
-                        fiber_index=ii,
-                    )
-                    # check: if the new fibers(cause it maybe more than
-                    # 1 fiber centers) will overlap with the
-                    # remaining ones or not
-                    if overlap_status == 0:
-                        ii = self._update_fiber_position(new_fiber=new_fiber, iter=ii)
-                    else:
-                        ii = ii + int(self.fiber_positions[ii, 4])
-                    del new_fiber, new_fiber_temp
+            if self.num_fibers < self.num_fibers_max:
+                with self.profile.timer("stirring"):
+                    num_moved = self._stirring()
+            self.profile.record_cycle(
+                cycle=self.num_cycle,
+                num_trials=self.num_trials - num_trials,
+                num_accepted=self.num_accepted - num_accepted,
+                num_moved=num_moved,
+                num_fibers=self.num_fibers,
+                vol_frac=float(self.vol_frac),
+            )
             # end of one cycle
             self.num_cycle = self.num_cycle + 1
 
-    def _update_fiber_position(self, new_fiber: np.ndarray, iter: int) -> int:
-        """update the fiber position
+    def _random_addition(self) -> None:
+        """random sequential addition of spheres, one sphere per trial"""
+        self.num_trial = 1
+        while (
+            self.num_trial < self.num_guess_max
+            and self.vol_frac < self.vol_req
+            and self.num_fibers < self.num_fibers_max
+            and not self._budget_exhausted()
+        ):
+            # update the info of number trial
+            self.num_trial = self.num_trial + 1
+            self.num_trials = self.num_trials + 1
+            radius_mu, radius_std = self._trial_radius()
+            fiber_temp = self.generate_random_fibers(
+                len_start=0.0,
+                len_end=self.length,
+                wid_start=0.0,
+                wid_end=self.width,
+                hei_start=0.0,
+                hei_end=self.height,
+                radius_mu=radius_mu,
+                radius_std=radius_std,
+                rng=self.rng,
+            )
+            new_fiber = fiber_temp.T
+            # check the overlap of new fiber
+            with self.profile.timer("overlap_check"):
+                overlap_status = self._neighbour_overlap_check(new_fiber=new_fiber)
+            if overlap_status == 0:
+                self._add_fiber(new_fiber=new_fiber)
+                self.vol_frac = (
+                    self.vol_frac
+                    + self.fiber_volume(new_fiber[0, 3]) / self.vol_total
+                )
+                self.num_fibers = self.num_fibers + 1
+                self.num_accepted = self.num_accepted + 1
+                self.radius_next = self.radius_next + 1
+                self._take_snapshots()
+            del new_fiber
+
+    def _stirring(self) -> int:
+        """stirring stage of a cycle, every sphere is moved towards its
+        closest neighbour if the moved sphere does not overlap
+
+        Returns
+        -------
+        int
+            number of moved spheres
+        """
+        num_moved = 0
+        # for every point, stirring is needed!!!
+        with self.profile.timer("neighbour_search"):
+            self._tree_nearest_neighbours()
+        for ii in range(len(self.fiber_store)):
+            if self._budget_exhausted():
+                break
+            with self.profile.timer("neighbour_search"):
+                (
+                    self.fiber_min_dis_vector,
+                    min_index,
+                    min_dis,
+                ) = self._neighbour_min_dis_index(ii=ii, cycle=self.num_cycle)
+            if min_index == ii:
+                # no other sphere to move towards (a single sphere, or the
+                # closest ones are excluded in this cycle)
+                continue
+            fiber_temp = self.fiber_store.fiber(ii)[0].copy()
+            # move towards the closest periodic image of the
+            # reference sphere
+            ref_point = self.fiber_store.fiber(min_index)[0].copy()
+            ref_point[0:3] = fiber_temp[0:3] + minimum_image(
+                ref_point[0:3] - fiber_temp[0:3], self.box
+            )
+            new_fiber = self.generate_first_heuristic_fibers(
+                ref_point=ref_point,
+                fiber_temp=fiber_temp,
+                dist_factor=self.dist_min_factor,
+                rng=self.rng,
+            )
+            new_fiber[0, 0:3] = np.mod(new_fiber[0, 0:3], self.box)
+            with self.profile.timer("overlap_check"):
+                overlap_status = self._neighbour_overlap_check(
+                    new_fiber=new_fiber, fiber_index=ii
+                )
+            # check: if the moved sphere will overlap with the
+            # remaining ones or not
+            if overlap_status == 0:
+                self._update_fiber_position(new_fiber=new_fiber, slot=ii)
+                num_moved = num_moved + 1
+            del new_fiber, fiber_temp, ref_point
+
+        return num_moved
+
+    def _add_fiber(self, new_fiber: np.ndarray) -> None:
+        """add an accepted sphere to the store and the cell list
+
+        Parameters
+        ----------
+        new_fiber : np.ndarray
+            the accepted sphere [x, y, z, r]
+        """
+        slot = self.fiber_store.append(new_fiber)
+        self.cell_list.insert(slot, new_fiber[0, 0:3])
+        self.radius_max = max(self.radius_max, new_fiber[0, 3])
+
+    def _update_fiber_position(self, new_fiber: np.ndarray, slot: int) -> None:
+        """update the fiber position in place
+
+        Parameters
+        ----------
+        new_fiber : np.ndarray
+            the moved sphere [x, y, z, r]
+        slot : int
+            slot id of the moved sphere in the fiber store
+        """
+        self.fiber_store.replace(slot, new_fiber)
+        self.cell_list.move(slot, new_fiber[0, 0:3])
+
+    def _neighbour_overlap_check(
+        self, new_fiber: np.ndarray, fiber_index: int = None
+    ) -> int:
+        """overlap check of the new sphere against the spheres in the
+        neighbouring cells of the cell list, the distances are measured
+        with the minimum image convention of the periodic RVE
 
         Parameters
         ----------
         new_fiber : np.ndarray
-            the generated new fiber
-        iter : int
-            determine the nex fiber should be analysis
+            new sphere [x, y, z, r]
+        fiber_index : int, optional
+            slot id of the sphere being moved in the stirring stage, it is
+            excluded from the check, by default None
 
         Returns
         -------
-        iter : int
-            he updated number of index
+        int
+            a flag to indicate overlap status
         """
-        # check the location compatibility
-        if new_fiber[0, 4] != new_fiber.shape[0]:
-            raise Exception("fiber number comparibility issue \n")
-
-        fiber_portion = int(self.fiber_positions[iter, 4].copy())
-        self.fiber_positions = np.delete(
-            self.fiber_positions,
-            tuple(i + iter for i in range(fiber_portion)),
-            axis=0,
-        )
-        self.fiber_positions = np.insert(
-            self.fiber_positions, (iter), new_fiber, axis=0
-        )
-        iter = iter + int(new_fiber[0, 4])
-        assert type(iter) is int
+        # scalar loop over the few candidates, numpy calls on arrays of a
+        # handful of rows cost more than the distance computations
+        x, y, z, radius = new_fiber[0, 0:4].tolist()
+        cut_off = self.dist_min_factor * (radius + self.radius_max)
+        length, width, height = self.length, self.width, self.height
+        rows = self.fiber_store.rows
+        for idx in self.cell_list.neighbour_list((x, y, z), cut_off):
+            if idx == fiber_index:
+                continue
+            x_other, y_other, z_other, radius_other = rows[idx, 0:4].tolist()
+            # minimum image distance
+            dx = x_other - x
+            dx = dx - length * round(dx / length)
+            dy = y_other - y
+            dy = dy - width * round(dy / width)
+            dz = z_other - z
+            dz = dz - height * round(dz / height)
+            if (
+                math.sqrt(dx * dx + dy * dy + dz * dz)
+                - self.dist_min_factor * (radius + radius_other)
+                <= 0
+            ):
+                return 1
+
+        return 0
+
+    def _tree_nearest_neighbours(self) -> None:
+        """find the first, second and third nearest neighbours of all
+        spheres with one periodic kd-tree query, used by
+        `_neighbour_min_dis_index` during the stirring stage of a cycle. The
+        cell list search is used when `neighbour_tree` is False or the
+        kd-tree of SciPy is not available
+        """
+        self.knn_dis, self.knn_index = None, None
+        if self.neighbour_tree:
+            self.knn_dis, self.knn_index = periodic_k_nearest(
+                points=self.fiber_store.rows[: len(self.fiber_store), 0:3],
+                box=self.box,
+                k=3,
+            )
+
+    def _neighbour_min_dis_index(
+        self, ii: int, cycle: int
+    ) -> Tuple[np.ndarray, int, float]:
+        """identify the closest sphere of sphere ii with the cell list, the
+        search radius is doubled until the closest sphere is guaranteed to
+        be found. The distances are measured with the minimum image
+        convention of the periodic RVE. The neighbours of the kd-tree query
+        of the cycle are used instead if they are available
+
+        Parameters
+        ----------
+        ii : int
+            the slot id of the being processed sphere
+        cycle : int
+            the cycle of the algorithm
 
-        return iter
+        Returns
+        -------
+        fiber_min_dis_vector: np.ndarray
+            The updated minimum distance array
+        min_index: int
+            The slot id of the minimum distance sphere
+        min_dist : float
+            The minimum distance to the minimum distance point
+        """
+        # the sphere itself and the closest spheres of the previous two cycles
+        excluded = [ii] + [
+            int(self.fiber_min_dis_vector[ii, cycle - jj, 0])
+            for jj in range(1, min(cycle, 2) + 1)
+        ]
+        if self.knn_index is not None:
+            # closest of the three nearest neighbours of the kd-tree query
+            # that is not excluded
+            for min_dis, min_index in zip(self.knn_dis[ii], self.knn_index[ii]):
+                if min_index < len(self.fiber_store) and min_index not in excluded:
+                    self.fiber_min_dis_vector[ii, cycle, 0] = min_index
+                    self.fiber_min_dis_vector[ii, cycle, 1] = min_dis
+                    return self.fiber_min_dis_vector, int(min_index), min_dis
+        temp_fiber = self.fiber_store.fiber(ii)[0, 0:3]
+        radius = self.cell_list.cell_size.min()
+        while True:
+            candidates = self.cell_list.neighbours(temp_fiber, radius)
+            candidates = candidates[~np.isin(candidates, excluded)]
+            points_dis = np.linalg.norm(
+                minimum_image(
+                    self.fiber_store.rows[candidates, 0:3] - temp_fiber, self.box
+                ),
+                axis=1,
+            )
+            if points_dis.shape[0] > 0 and points_dis.min() <= radius:
+                break
+            if self.cell_list.covers_box(radius):
+                break
+            radius = 2 * radius
+        if points_dis.shape[0] == 0:
+            # a single sphere in the RVE
+            min_dis = math.inf
+            min_index = ii
+        else:
+            min_dis = points_dis.min()
+            min_index = int(candidates[np.argmin(points_dis)])
+        self.fiber_min_dis_vector[ii, cycle, 0] = min_index
+        self.fiber_min_dis_vector[ii, cycle, 1] = min_dis
 
-    def crate_rgmsh(self, num_discrete: int = 10) -> np.ndarray:
+        return self.fiber_min_dis_vector, min_index, min_dis
+
+    def split_fibers(self, fibers: np.ndarray) -> np.ndarray:
+        """split the spheres crossing the boundary of the RVE into their
+        periodic partitions
+
+        Parameters
+        ----------
+        fibers : np.ndarray
+            spheres [x, y, z, r] with the center inside the RVE
+
+        Returns
+        -------
+        np.ndarray
+            fiber positions [x, y, z, r, p], one row per partition
+        """
+        new_fibers, _ = self.new_positions_batch(
+            fibers=fibers, length=self.length, width=self.width, height=self.height
+        )
+        return new_fibers
+
+    def crate_rgmsh(
+        self,
+        num_discrete: int = 10,
+        periodic: bool = True,
+        partial_volume: bool = False,
+        chunk_size: int = 2**20,
+    ) -> np.ndarray:
         """create rgmsh numpy array for crate
 
         Parameters
         ----------
         num_discrete : int, optional
             number of discrete partition, by default 10
+        periodic : bool, optional
+            wrap the spheres crossing the boundary to the opposite side of
+            the RVE, by default True
+        partial_volume : bool, optional
+            store the sphere volume fraction of every cell instead of a
+            binary phase map, by default False
+        chunk_size : int, optional
+            maximum number of cells evaluated at once, by default 2**20
 
         Returns
         -------
@@ -328,31 +639,16 @@ class SphereParticles(MicrostructureGenerator):
             3d numpy array that contains the micro-structure information
         """
 
-        self.rgmsh = np.zeros((num_discrete, num_discrete, num_discrete))
-        grid_len = self.length / num_discrete
-        grid_wid = self.width / num_discrete
-        grid_height = self.height / num_discrete
-        radius = self.fiber_positions[:, 3].reshape(-1, 1)
-        for ii in range(num_discrete):
-            for jj in range(num_discrete):
-                for kk in range(num_discrete):
-                    loc_temp = np.array(
-                        [
-                            [
-                                self.length / (2 * num_discrete) + ii * grid_len,
-                                self.width / (2 * num_discrete) + jj * grid_wid,
-                                self.height / (2 * num_discrete) + kk * grid_height,
-                            ]
-                        ]
-                    )
-                    # distance measure
-                    points_dis_temp = distance_matrix(
-                        self.fiber_positions[:, 0:3],
-                        loc_temp,
-                    )
-
-                    if (points_dis_temp - radius).min() < 0:
-                        self.rgmsh[ii, jj, kk] = 1
+        fibers = self.fiber_store.to_array()
+        self.rgmsh = rasterize_particles(
+            centers=fibers[:, 0:3],
+            radius=fibers[:, 3],
+            box=self.box,
+            num_discrete=num_discrete,
+            periodic=periodic,
+            partial_volume=partial_volume,
+            chunk_size=chunk_size,
+        )
 
         return self.rgmsh.T
 
@@ -421,1458 +717,52 @@ class SphereParticles(MicrostructureGenerator):
 
         return fiber
 
-    def new_positions(
-        self,
-        x_center: float,
-        y_center: float,
-        z_center: float,
-        radius: float,
-        width: float,
-        length: float,
-        height: float,
-    ) -> np.ndarray:
-        """This is the function used to determine the locations of disks
-        considering the boundary of RVE. To be specific, the disk should
-        be divided into two parts or four parts if it is located in the
-        outskirt area
+    @staticmethod
+    def new_positions_batch(
+        fibers: np.ndarray, length: float, width: float, height: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """split a batch of spheres crossing the boundary of the RVE into
+        their periodic partitions, the partitions of every sphere are
+        consecutive rows
 
         Parameters
         ----------
-        x_center : float
-            new center of X axis
-        y_center : float
-            new center of Y axis
-        z_center : float
-            new center of Z axis
-        radius : float
-            radius of the disk
-        width : float
-            width of RVE
+        fibers : np.ndarray
+            spheres [x, y, z, r], one row per sphere
         length : float
             length of RVE
+        width : float
+            width of RVE
         height : float
             height of RVE
 
         Returns
         -------
-        np.ndarray
-            XC, YC, ZC, radius, and split  which are the new locations of this fiber
-            (because in some locations, the circles need to be split)
-
-        """
-
-        new_fiber = np.zeros((1, 5))
-        if (
-            radius <= x_center <= length - radius
-            and radius <= y_center <= width - radius
-            and radius <= z_center <= height - radius
-        ):
-            # locate in center region and split = 1
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 1)
-
-        elif (
-            x_center < radius
-            and radius < y_center < width - radius
-            and radius < z_center < height - radius
-        ):
-
-            # locate in center region and split = 2, there should have one
-            # fiber in the countpart side
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 2)
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 2]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center > length - radius
-            and radius < y_center < width - radius
-            and radius < z_center < height - radius
-        ):
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 2)
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 2]
-                    ).reshape((1, 5)),
-                ),
-            )
-        elif (
-            radius < x_center < length - radius
-            and y_center < radius
-            and radius < z_center < height - radius
-        ):
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 2)
-            # add one more point on the counter side
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 2]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-        elif (
-            radius < x_center < length - radius
-            and y_center > width - radius
-            and radius < z_center < height - radius
-        ):
-
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 2)
-            # add one more point on the counter side
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 2]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-        elif (
-            radius < x_center < length - radius
-            and radius < y_center < width - radius
-            and z_center > height - radius
-        ):
-
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 2)
-            # add one more point on the counter side
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 2]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            radius < x_center < length - radius
-            and radius < y_center < width - radius
-            and z_center < radius
-        ):
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 2)
-            # add one more point on the counter side
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 2]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center < radius
-            and y_center < radius
-            and radius < z_center < height - radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center + width,
-                            z_center,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-        elif (
-            x_center > length - radius
-            and y_center < radius
-            and radius < z_center < height - radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center + width,
-                            z_center,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center < radius
-            and y_center > width - radius
-            and radius < z_center < height - radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center - width,
-                            z_center,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center > length - radius
-            and y_center > width - radius
-            and radius < z_center < height - radius
-        ):  # split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center - width,
-                            z_center,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center < radius
-            and radius < y_center < width - radius
-            and z_center < radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center,
-                            z_center + height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center < radius
-            and radius < y_center < width - radius
-            and z_center > height - radius
-        ):  # 4 split
-            new_fiber[0, 0] = x_center
-            new_fiber[0, 1] = y_center
-            new_fiber[0, 2] = z_center
-            new_fiber[0, 3] = radius
-            new_fiber[0, 4] = 4
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center,
-                            z_center - height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center > length - radius
-            and radius < y_center < width - radius
-            and z_center < radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center,
-                            z_center + height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center > length - radius
-            and radius < y_center < width - radius
-            and z_center > height - radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center,
-                            z_center - height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            radius < x_center < length - radius
-            and y_center < radius
-            and z_center < radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center + width,
-                            z_center + height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            radius < x_center < length - radius
-            and y_center > width - radius
-            and z_center < radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center - width,
-                            z_center + height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            radius < x_center < length - radius
-            and y_center < radius
-            and z_center > height - radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center + width,
-                            z_center - height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            radius < x_center < length - radius
-            and y_center > width - radius
-            and z_center > height - radius
-        ):  # 4 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 4)
-
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 4]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 4]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center - width,
-                            z_center - height,
-                            radius,
-                            4,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif x_center < radius and y_center < radius and z_center < radius:  # 8 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center + width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center + width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center + width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center < radius and y_center > width - radius and z_center < radius
-        ):  # 8 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center - width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center - width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center - width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center < radius and y_center < radius and z_center > height - radius
-        ):  # 8 split
-
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center + width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center + width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center + width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center < radius
-            and y_center > width - radius
-            and z_center > height - radius
-        ):  # 8 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center + length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center - width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center + length,
-                            y_center - width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center - width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center > length - radius and y_center < radius and z_center < radius
-        ):  # 8 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center + width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center + width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center + width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-        elif (
-            x_center > length - radius
-            and y_center > width - radius
-            and z_center < radius
-        ):  # 8 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center - width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center - width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center + height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center - width,
-                            z_center + height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-        elif (
-            x_center > length - radius
-            and y_center < radius
-            and z_center > height - radius
-        ):  # 8 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center + width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center + width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center + width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center + width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        elif (
-            x_center > length - radius
-            and y_center > width - radius
-            and z_center > height - radius
-        ):  # 8 split
-            new_fiber = self._first_new_fiber(x_center, y_center, z_center, radius, 8)
-            # still has three points at counter edges
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center - length, y_center, z_center, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center - width,
-                            z_center,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center - length,
-                            y_center - width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array([x_center, y_center - width, z_center, radius, 8]).reshape(
-                        (1, 5)
-                    ),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [x_center, y_center, z_center - height, radius, 8]
-                    ).reshape((1, 5)),
-                ),
-            )
-            new_fiber = np.vstack(
-                (
-                    new_fiber,
-                    np.array(
-                        [
-                            x_center,
-                            y_center - width,
-                            z_center - height,
-                            radius,
-                            8,
-                        ]
-                    ).reshape((1, 5)),
-                ),
-            )
-
-        else:
-            raise Exception("The location of the original point was wrong!!! \n")
-
-        return new_fiber
-
-    @staticmethod
-    def overlap_check(
-        new_fiber: np.ndarray,
-        fiber_pos: np.ndarray,
-        dist_factor: float,
-        fiber_index: int = 0,
-        stage: str = "step_one",
-    ) -> int:
-        """overlap check of the new fiber and the orginal ones
-
-        Parameters
-        ----------
-        new_fiber : np.ndarray
-            new fiber location
-        fiber_pos : np.ndarray
-            original fiber locations
-        dist_factor : float
-            distance factor
-        fiber_index : int, optional
-            fiber index, by default 0
-        stage : str, optional
-            stage of the algorithm, by default "step_one"
-
-        Returns
-        -------
-        int
-            a flag to indicate overlap status
-
-        Raises
-        ------
-        ValueError
-            stage not been implemented error
+        Tuple[np.ndarray, np.ndarray]
+            locations of all partitions [x, y, z, r, p] and the index of the
+            sphere every partition belongs to
         """
-        fiber_pos = fiber_pos.copy()
-
-        if stage == "step_one":
-            min_dis_threhold = dist_factor * (
-                new_fiber[0, 3] + fiber_pos[:, 3]
-            ).reshape((-1, 1))
-            points_dis_temp = distance_matrix(fiber_pos[:, 0:3], new_fiber[:, 0:3])
-            points_dis = np.min(points_dis_temp, 1, keepdims=True)
-            min_dis = points_dis - min_dis_threhold
-
-        elif stage == "step_two":
-            # calculate the minmum distance threshold
-            min_dis_threhold = dist_factor * (
-                new_fiber[0, 3] + fiber_pos[:, 3]
-            ).reshape((-1, 1))
-            points_dis_temp = distance_matrix(fiber_pos[:, 0:3], new_fiber[:, 0:3])
-            points_dis_temp[
-                fiber_index: fiber_index + int(fiber_pos[fiber_index, 4]), :
-            ] = math.inf
-            points_dis = np.min(points_dis_temp, 1, keepdims=True)
-            min_dis = points_dis - min_dis_threhold
-
-        else:
-            raise ValueError(" Not defined stage \n")
-
-        if min_dis.min() <= 0:
-            status = 1
-        else:
-            status = 0
-
-        return status
-
-    @staticmethod
-    def min_dis_index(
-        temp_fiber: np.ndarray,
-        fiber_pos: np.ndarray,
-        fiber_min_dis_vector: np.ndarray,
-        ii: int,
-        cycle: int,
-    ) -> Tuple[np.ndarray, int, float]:
-        """This function is used to identify the index of closest fiber
-        of every fiber, which is very import for the first heuristic
-        stirring to get more space placing the new disks.
-
-        Parameters
-        ----------
-        temp_fiber : np.ndarray
-            the fiber been processed
-        fiber_pos : np.ndarray
-            fiber position
-        fiber_min_dis_vector : np.ndarray
-            the first column is the index of the closed point,
-            the second column contains the minimum distance between
-            those two points
-        ii : int
-            the index of the being processed point
-        cycle : int
-            the cycle of the algorithm. At different cycles, the
-            criteria of identifying the closed point are  different.
-
-        Returns
-        -------
-        fiber_min_dis_vector: np.ndarray
-            The updated minimum distance array
-        two: int
-            The index of the minimum distance point
-        three : float
-            The minimum distance to the minimum distance point
-
-        """
-        fiber_pos = fiber_pos.copy()
-
-        # pre-process the data : find out the same row data and delete it
-        temp_fiber = temp_fiber.reshape((1, 3))
-        points_dis = distance_matrix(fiber_pos[:, 0:3], temp_fiber)
-        points_dis[points_dis == 0] = math.inf
-        if cycle == 0:
-            min_dis = points_dis.min()
-            min_index = np.where(points_dis == min_dis)[0]
-            fiber_min_dis_vector[ii, cycle, 0] = min_index
-            fiber_min_dis_vector[ii, cycle, 1] = min_dis
-
-        elif cycle == 1:
-            index_pre = int(fiber_min_dis_vector[ii, cycle - 1, 0])
-            if index_pre < points_dis.shape[0]:
-                points_dis[index_pre, :] = math.inf
-            # identify the minimum index
-            min_dis = points_dis.min()
-            min_index = np.where(points_dis == min_dis)[0]
-            fiber_min_dis_vector[ii, cycle, 0] = min_index
-            fiber_min_dis_vector[ii, cycle, 1] = min_dis
-        else:
-
-            index_pre = int(fiber_min_dis_vector[ii, cycle - 1, 0])
-            index_pre_pre = int(fiber_min_dis_vector[ii, cycle - 2, 0])
-            if index_pre < points_dis.shape[0] and index_pre_pre < points_dis.shape[0]:
-                points_dis[index_pre, :] = math.inf
-                points_dis[index_pre_pre, :] = math.inf
-            # identify the minimum index
-            min_dis = points_dis.min()
-            min_index = np.where(points_dis == min_dis)[0]
-            fiber_min_dis_vector[ii, cycle, 0] = min_index
-            fiber_min_dis_vector[ii, cycle, 1] = min_dis
-
-        return fiber_min_dis_vector, min_index, min_dis
+        box = np.array([length, width, height])
+        centers, r = fibers[:, 0:3], fibers[:, 3:4]
+        shift = np.where(
+            centers < r, box, np.where(centers > box - r, -box, 0.0)
+        )
+        split = shift != 0
+        portion = np.prod(1 + split, axis=1)
+        # partition candidates: itself, shift in x, y, xy, z, xz, yz, xyz
+        images = []
+        keep = []
+        for mask in range(8):
+            axes = np.array([(mask >> axis) & 1 for axis in range(3)], dtype=bool)
+            images.append(centers + shift * axes)
+            keep.append(np.all(split | ~axes, axis=1))
+        images = np.stack(images, axis=1)
+        keep = np.column_stack(keep)
+        owner = np.repeat(np.arange(fibers.shape[0]), portion)
+        new_fibers = np.column_stack(
+            (images[keep], r[owner, 0], portion[owner].astype(float))
+        )
+        return new_fibers, owner
 
     @staticmethod
     def generate_first_heuristic_fibers(
@@ -1912,27 +802,3 @@ class SphereParticles(MicrostructureGenerator):
         fiber_temp[0, 0:3] = fiber_loc + delta * k * (ref_loc - fiber_loc)
 
         return fiber_temp
-
-    @staticmethod
-    def _first_new_fiber(x: float, y: float, z: float, r: float, portion: int):
-        """generate the first new fiber
-
-        Parameters
-        ----------
-        x : float
-            x center
-        y : float
-            y center
-        z :flost
-            z center
-        r : float
-            radius
-        portion : int
-            portion of the fiber(1, 2, 4)
-
-        Returns
-        -------
-        np.ndarray
-            new fiber
-        """
-        return np.array([[x, y, z, r, portion]])
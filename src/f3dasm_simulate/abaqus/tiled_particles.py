@@ -0,0 +1,383 @@
+"""
+Domain-decomposed parallel generation of large periodic RVEs.
+"""
+
+#                                                                       Modules
+# =============================================================================
+# standard
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+# Third party
+import numpy as np
+
+# import local functions
+from .circle_particles import CircleParticles
+from .fiber_store import FiberStore
+from .microstructure_generator import GenerationResult
+from .neighbour_search import PeriodicCellList, minimum_image
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+
+def tile_colours(num_tiles: Tuple[int, ...]) -> List[List[Tuple[int, ...]]]:
+    """group the tiles of a periodic grid into colours, two tiles of the
+    same colour are never neighbours (also not across the periodic
+    boundary) if the number of tiles along every axis is 1 or even
+
+    Parameters
+    ----------
+    num_tiles : Tuple[int, ...]
+        number of tiles along every axis
+
+    Returns
+    -------
+    List[List[Tuple[int, ...]]]
+        tile indices of every colour
+    """
+    colours = []
+    for colour in itertools.product(*[range(min(num, 2)) for num in num_tiles]):
+        colours.append(
+            [
+                tile
+                for tile in itertools.product(*[range(num) for num in num_tiles])
+                if all(index % 2 == part for index, part in zip(tile, colour))
+            ]
+        )
+    return colours
+
+
+def halo_fibers(
+    fibers: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    box: np.ndarray,
+    halo: float,
+) -> np.ndarray:
+    """fibers with the center closer than `halo` to a tile, measured per
+    axis with the minimum image convention
+
+    Parameters
+    ----------
+    fibers : np.ndarray
+        fibers [x, y, (z), r], one row per fiber
+    lower : np.ndarray
+        lower corner of the tile
+    upper : np.ndarray
+        upper corner of the tile
+    box : np.ndarray
+        size of the periodic RVE
+    halo : float
+        width of the halo around the tile
+
+    Returns
+    -------
+    np.ndarray
+        fibers of the halo (including the fibers inside the tile)
+    """
+    dim = box.shape[0]
+    centre = 0.5 * (lower + upper)
+    distance = np.abs(minimum_image(fibers[:, 0:dim] - centre, box))
+    inside = np.all(distance < 0.5 * (upper - lower) + halo, axis=1)
+    return fibers[inside]
+
+
+def _fill_tile(
+    args: Tuple[
+        np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray,
+        float, float, np.random.SeedSequence, int, Optional[float],
+    ]
+) -> Tuple[np.ndarray, int]:
+    """random sequential addition of fibers with the center inside a tile,
+    executed by the workers. The fibers are inserted in the given order and
+    checked against the halo fibers of the neighbouring tiles and the
+    fibers placed before, with minimum image distances
+
+    Parameters
+    ----------
+    args : tuple
+        box, lower and upper corner of the tile, radii to insert, halo
+        fibers, distance factor, cell size of the cell list, seed of the
+        random stream, maximum number of trials and wall-clock deadline
+        (None for no deadline)
+
+    Returns
+    -------
+    Tuple[np.ndarray, int]
+        inserted fibers [x, y, (z), r] and the number of trials
+    """
+    (box, lower, upper, radii, halo, dist_min_factor, cell_size, seed,
+     num_guess_max, deadline) = args
+    dim = box.shape[0]
+    rng = np.random.default_rng(seed)
+    fibers = np.zeros((halo.shape[0] + radii.shape[0], dim + 1))
+    fibers[: halo.shape[0]] = halo
+    num_fibers = halo.shape[0]
+    cell_list = PeriodicCellList(box=box, cell_size=cell_size)
+    cell_list.rebuild(halo[:, 0:dim])
+    radius_max = max(radii.max(initial=0.0), halo[:, dim].max(initial=0.0))
+
+    num_trials = 0
+    for radius in radii:
+        inserted = False
+        while (
+            not inserted
+            and num_trials < num_guess_max
+            and (deadline is None or time.time() < deadline)
+        ):
+            num_trials = num_trials + 1
+            point = rng.uniform(lower, upper)
+            candidates = cell_list.neighbours(
+                point, dist_min_factor * (radius + radius_max)
+            )
+            if candidates.shape[0] > 0:
+                points_dis = np.linalg.norm(
+                    minimum_image(fibers[candidates, 0:dim] - point, box),
+                    axis=1,
+                )
+                min_dis = points_dis - dist_min_factor * (
+                    radius + fibers[candidates, dim]
+                )
+                if min_dis.min() <= 0:
+                    continue
+            fibers[num_fibers, 0:dim] = point
+            fibers[num_fibers, dim] = radius
+            cell_list.insert(num_fibers, point)
+            num_fibers = num_fibers + 1
+            inserted = True
+        if not inserted:
+            # the trials or the time of the tile are used up
+            break
+
+    return fibers[halo.shape[0]: num_fibers], num_trials
+
+
+class TiledCircleParticles(CircleParticles):
+    """2D RVE with disks generated tile by tile in parallel processes, for
+    statistical volume elements with 10^4 - 10^5 disks
+
+    The radii of the disks needed for `vol_req` are sampled up front and
+    dealt over the tiles of a regular grid. The tiles are filled by random
+    sequential addition in the order of descending radius. Neighbouring
+    tiles are never filled at the same time: the tiles are grouped into
+    colours (a checkerboard, 4 colours in 2D) and the tiles of one colour
+    are filled in parallel, after which the disks close to the tile borders
+    are passed as halo to the tiles of the next colours. Every disk is
+    checked against all disks it can touch, the stitched packing is
+    therefore free of overlaps. The RVE is periodic and the output
+    (`fiber_positions`, `to_abaqus_format`, `crate_rgmsh`) is the same as
+    for `CircleParticles`. There is no stirring stage, the reachable volume
+    fraction is that of the random sequential addition.
+
+    Parameters
+    ----------
+    CircleParticles : class
+        2D RVE generator, provides the output formats
+    """
+
+    version = "1"
+
+    def __init__(
+        self,
+        length: float,
+        width: float,
+        radius_mu: float,
+        radius_std: float,
+        vol_req: float,
+        num_tiles: Tuple[int, int] = (4, 4),
+        n_workers: int = 1,
+        num_guess_max: int = 50000,
+        dist_min_factor: float = 1.1,
+    ) -> None:
+        """Initialization
+
+        Parameters
+        ----------
+        length : float
+            length of RVE
+        width : float
+            width of RVE
+        radius_mu : float
+            mean of circle's radius
+        radius_std : float
+            std of circle's radius
+        vol_req : float
+            required volume fraction
+        num_tiles : Tuple[int, int], optional
+            number of tiles along the length and the width, 1 or even. A
+            tile should be wider than twice the contact distance of the
+            largest disks, by default (4, 4) (4 tiles per colour)
+        n_workers : int, optional
+            number of worker processes, the tiles are filled in the calling
+            process if 1. Only the tiles of one colour are filled at the
+            same time, a grid with a single tile per colour, e.g. (2, 2),
+            is rejected if n_workers > 1, by default 1
+        num_guess_max : int, optional
+            maximum trials per tile, by default 50000
+        dist_min_factor : float, optional
+            distance factor, by default 1.1
+        """
+        # geometry information of the 2D RVE with homogeneous circles
+        self.length = length
+        self.width = width
+        self.radius_mu = radius_mu
+        self.radius_std = radius_std
+        self.vol_req = vol_req
+
+        # Initialization of the algorithm
+        self.dist_min_factor = dist_min_factor
+        self.num_guess_max = num_guess_max
+        self.num_tiles = tuple(num_tiles)
+        self.n_workers = n_workers
+        if any(num != 1 and num % 2 != 0 for num in self.num_tiles):
+            raise ValueError("the number of tiles should be 1 or even \n")
+        if n_workers > 1 and len(tile_colours(self.num_tiles)[0]) < 2:
+            raise ValueError(
+                f"{self.num_tiles} tiles have a single tile per colour and "
+                "are filled one after the other, use more tiles or "
+                "n_workers=1 \n"
+            )
+
+    def generate_microstructure(
+        self,
+        seed: any = None,
+        time_budget: float = None,
+        trial_budget: int = None,
+    ) -> GenerationResult:
+        """generate the microstructure tile by tile
+
+        Parameters
+        ----------
+        seed : any, optional
+            seed number or seed sequence, the result only depends on the
+            seed and not on the number of workers, by default None
+        time_budget : float, optional
+            wall-clock budget in seconds, by default None (no budget)
+        trial_budget : int, optional
+            budget of trials, shared evenly by the tiles, by default None
+            (no budget)
+
+        Returns
+        -------
+        GenerationResult
+            reached volume fraction, trials and the number of colours (as
+            cycles)
+        """
+        # counting time generating an RVE
+        start_time = time.time()
+        self._start_budget(time_budget=time_budget, trial_budget=trial_budget)
+        self._start_snapshots(None)
+        self._parameter_initialization()
+        seed_sequence = (
+            seed
+            if isinstance(seed, np.random.SeedSequence)
+            else np.random.SeedSequence(seed)
+        )
+        children = seed_sequence.spawn(int(np.prod(self.num_tiles)) + 1)
+        self.rng = np.random.default_rng(children[0])
+        self._procedure_initialization()
+        self._core_iteration(children[1:])
+        end_time = time.time()
+        self.time_usage = end_time - start_time
+
+        return self._generation_result(stop_reason="num_guess_max")
+
+    def _procedure_initialization(self) -> None:
+        """sample the radii and deal them over the tiles"""
+        radii = self._sample_radii(self.vol_req)
+        self.tile_size = self.box / np.array(self.num_tiles)
+        # largest distance at which two disks can touch
+        self.halo = 2 * self.dist_min_factor * radii[0]
+        if np.any(self.tile_size <= self.halo):
+            raise ValueError(
+                "tiles are too small for the size of the disks, use fewer "
+                "tiles \n"
+            )
+        tiles = list(itertools.product(*[range(num) for num in self.num_tiles]))
+        # every tile gets the same share of large and small radii
+        self.tile_radii = {
+            tile: radii[ii:: len(tiles)] for ii, tile in enumerate(tiles)
+        }
+        self.num_guess_tile = self.num_guess_max
+        if self.trial_budget is not None:
+            self.num_guess_tile = min(
+                self.num_guess_tile, self.trial_budget // len(tiles)
+            )
+
+    def _core_iteration(self, seeds: List[np.random.SeedSequence]) -> None:
+        """fill the tiles colour by colour and stitch them
+
+        Parameters
+        ----------
+        seeds : List[np.random.SeedSequence]
+            seed of every tile, in the order of the tile indices
+        """
+        tiles = list(itertools.product(*[range(num) for num in self.num_tiles]))
+        tile_seeds = dict(zip(tiles, seeds))
+        deadline = (
+            None if self.time_budget is None else self.start_time + self.time_budget
+        )
+        placed = [np.zeros((0, 3))]
+        self.num_cycle = 0
+        executor = (
+            ProcessPoolExecutor(max_workers=self.n_workers)
+            if self.n_workers > 1
+            else None
+        )
+        try:
+            for colour in tile_colours(self.num_tiles):
+                fibers = np.concatenate(placed, axis=0)
+                tasks = []
+                for tile in colour:
+                    lower = np.array(tile) * self.tile_size
+                    upper = lower + self.tile_size
+                    tasks.append((
+                        self.box, lower, upper, self.tile_radii[tile],
+                        halo_fibers(fibers, lower, upper, self.box, self.halo),
+                        self.dist_min_factor, 2 * self.dist_min_factor * self.radius_mu,
+                        tile_seeds[tile], self.num_guess_tile, deadline,
+                    ))
+                if executor is not None:
+                    results = list(executor.map(_fill_tile, tasks))
+                else:
+                    results = [_fill_tile(task) for task in tasks]
+                for tile_fibers, num_trials in results:
+                    placed.append(tile_fibers)
+                    self.num_trials = self.num_trials + num_trials
+                    self.num_accepted = self.num_accepted + tile_fibers.shape[0]
+                self.num_cycle = self.num_cycle + 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self._finalize(np.concatenate(placed, axis=0))
+        if (
+            self.vol_frac < self.vol_req
+            and not self._budget_exhausted()
+            and self.num_guess_tile < self.num_guess_max
+        ):
+            # the trials of the tiles are limited by the trial budget
+            self.stop_reason = "trial_budget"
+
+    def _finalize(self, fibers: np.ndarray) -> None:
+        """store the stitched disks in the fiber store
+
+        Parameters
+        ----------
+        fibers : np.ndarray
+            disks of all tiles [x, y, r]
+        """
+        self.fiber_store = FiberStore(num_columns=3, capacity=fibers.shape[0])
+        for fiber in fibers:
+            self.fiber_store.append(fiber.reshape((1, 3)))
+        self.num_fibers = fibers.shape[0]
+        self.vol_frac = self.fiber_volume(fibers[:, 2]).sum() / self.vol_total
@@ -0,0 +1,123 @@
+"""
+End-to-end benchmark of the overlap check of CircleParticles.
+
+The generation of `CircleParticles` with the periodic cell list is timed
+against the same generator with a brute-force overlap check of every trial
+disk against all stored disks (vectorized minimum image distances). Both
+take the same accept/reject decisions and generate the same packing, so
+the complete `generate_microstructure` time is compared, from RVEs with a
+few tens of disks to RVEs with several hundred disks.
+
+Usage:
+  python circle_overlap_check.py
+"""
+
+#                                                                       Modules
+# =============================================================================
+
+# Standard
+import time
+
+# Third-party
+import numpy as np
+
+# Local
+from f3dasm_simulate.abaqus.circle_particles import CircleParticles
+from f3dasm_simulate.abaqus.neighbour_search import minimum_image
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+RADIUS_MU = 0.003
+# size of the RVE and required volume fraction
+CASES = [(0.048, 0.3), (0.048, 0.5), (0.1, 0.4), (0.14, 0.45)]
+SEEDS = range(2)
+
+
+class BruteForceCircleParticles(CircleParticles):
+    """CircleParticles with a brute-force overlap check"""
+
+    def _neighbour_overlap_check(
+        self, new_fiber: np.ndarray, fiber_index: int = None
+    ) -> int:
+        fiber_pos = self.fiber_store.rows[: len(self.fiber_store)]
+        points_dis = np.linalg.norm(
+            minimum_image(fiber_pos[:, 0:2] - new_fiber[0, 0:2], self.box),
+            axis=1,
+        )
+        min_dis = points_dis - self.dist_min_factor * (
+            new_fiber[0, 2] + fiber_pos[:, 2]
+        )
+        if fiber_index is not None:
+            min_dis[fiber_index] = np.inf
+        return int(min_dis.min() <= 0)
+
+
+def run(generator_class: type, size: float, vol_req: float) -> dict:
+    """generate the packings of all seeds
+
+    Parameters
+    ----------
+    generator_class : type
+        generator class
+    size : float
+        size of the square RVE
+    vol_req : float
+        required volume fraction
+
+    Returns
+    -------
+    dict
+        total generation time, mean reached volume fraction and number of
+        disks, and the packings
+    """
+    packings, times, vol_fracs = [], [], []
+    for seed in SEEDS:
+        generator = generator_class(
+            length=size,
+            width=size,
+            radius_mu=RADIUS_MU,
+            radius_std=0.0,
+            vol_req=vol_req,
+            dist_min_factor=1.2,
+        )
+        start_time = time.perf_counter()
+        generator.generate_microstructure(seed=seed)
+        times.append(time.perf_counter() - start_time)
+        vol_fracs.append(generator.vol_frac)
+        packings.append(generator.fiber_store.to_array())
+
+    return {
+        "time": sum(times),
+        "vol_frac": np.mean(vol_fracs),
+        "disks": np.mean([packing.shape[0] for packing in packings]),
+        "packings": packings,
+    }
+
+
+def main():
+    print(
+        f"{'size':>6} {'vol_req':>8} {'vol_frac':>9} {'disks':>6} "
+        f"{'brute [s]':>10} {'cell list [s]':>14} {'speedup':>8}"
+    )
+    for size, vol_req in CASES:
+        brute_force = run(BruteForceCircleParticles, size, vol_req)
+        cell_list = run(CircleParticles, size, vol_req)
+        for packing, reference in zip(cell_list["packings"], brute_force["packings"]):
+            assert np.array_equal(packing, reference), "packings differ"
+        print(
+            f"{size:>6.3f} {vol_req:>8.2f} {cell_list['vol_frac']:>9.3f} "
+            f"{cell_list['disks']:>6.0f} {brute_force['time']:>10.1f} "
+            f"{cell_list['time']:>14.1f} "
+            f"{brute_force['time'] / cell_list['time']:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
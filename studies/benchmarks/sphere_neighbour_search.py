@@ -0,0 +1,243 @@
+"""
+Benchmark of the periodic cell list used by SphereParticles on dense
+packings.
+
+Random sequential addition of equal spheres stalls slightly above a volume
+fraction of 0.3, so the queries are timed on fixed packings at 0.4 and 0.5
+instead of through the generation: jittered face-centred cubic packings of
+the periodic unit cube. The spheres are shrunk to the volume fraction and
+moved by less than half the gap between neighbours, so the packings are
+valid and irregular. Every packing is loaded as the warm start of
+`SphereParticles` and of the same generator with a brute-force overlap
+check and nearest neighbour search over all stored spheres. Both answer the
+overlap check of random trial spheres and the nearest neighbour search of
+the stirring stage for every sphere, with the same results.
+
+Usage:
+  python sphere_neighbour_search.py
+"""
+
+#                                                                       Modules
+# =============================================================================
+
+# Standard
+import math
+import time
+from typing import Tuple
+
+# Third-party
+import numpy as np
+
+# Local
+from f3dasm_simulate.abaqus.neighbour_search import minimum_image
+from f3dasm_simulate.abaqus.sphere_particles import SphereParticles
+
+#                                                          Authorship & Credits
+# =============================================================================
+__author__ = "Jiaxiang Yi (J.Yi@tudelft.nl)"
+__credits__ = ["Jiaxiang Yi"]
+__status__ = "Stable"
+# =============================================================================
+#
+# =============================================================================
+
+# face-centred cubic cells per side of the unit cube, 4 spheres per cell
+NUM_CELLS = 10
+VOL_REQS = [0.4, 0.5]
+NUM_TRIALS = 20000
+
+
+class BruteForceSphereParticles(SphereParticles):
+    """SphereParticles with a brute-force overlap check and nearest
+    neighbour search over all stored spheres"""
+
+    def _stored(self) -> np.ndarray:
+        """view on the rows of the stored spheres, no copy"""
+        return self.fiber_store.rows[: len(self.fiber_store)]
+
+    def _neighbour_overlap_check(
+        self, new_fiber: np.ndarray, fiber_index: int = None
+    ) -> int:
+        fiber_pos = self._stored()
+        points_dis = np.linalg.norm(
+            minimum_image(fiber_pos[:, 0:3] - new_fiber[0, 0:3], self.box),
+            axis=1,
+        )
+        min_dis = points_dis - self.dist_min_factor * (
+            new_fiber[0, 3] + fiber_pos[:, 3]
+        )
+        if fiber_index is not None:
+            min_dis[fiber_index] = np.inf
+        return int(min_dis.min() <= 0)
+
+    def _neighbour_min_dis_index(
+        self, ii: int, cycle: int
+    ) -> Tuple[np.ndarray, int, float]:
+        fiber_pos = self._stored()
+        points_dis = np.linalg.norm(
+            minimum_image(fiber_pos[:, 0:3] - fiber_pos[ii, 0:3], self.box),
+            axis=1,
+        )
+        points_dis[ii] = np.inf
+        for jj in range(1, min(cycle, 2) + 1):
+            points_dis[int(self.fiber_min_dis_vector[ii, cycle - jj, 0])] = np.inf
+        min_index = int(np.argmin(points_dis))
+        min_dis = points_dis[min_index]
+        if math.isinf(min_dis):
+            min_index = ii
+        self.fiber_min_dis_vector[ii, cycle, 0] = min_index
+        self.fiber_min_dis_vector[ii, cycle, 1] = min_dis
+
+        return self.fiber_min_dis_vector, min_index, min_dis
+
+
+def dense_packing(vol_frac: float, seed: int = 0) -> np.ndarray:
+    """jittered face-centred cubic packing of equal spheres in the periodic
+    unit cube
+
+    Parameters
+    ----------
+    vol_frac : float
+        volume fraction, below the 0.74 of the face-centred cubic packing
+    seed : int, optional
+        seed of the jitter, by default 0
+
+    Returns
+    -------
+    np.ndarray
+        spheres [x, y, z, r], one row per sphere
+    """
+    rng = np.random.default_rng(seed)
+    basis = np.array([[0, 0, 0], [0.5, 0.5, 0], [0.5, 0, 0.5], [0, 0.5, 0.5]])
+    cells = np.stack(
+        np.meshgrid(*[np.arange(NUM_CELLS)] * 3, indexing="ij"), axis=-1
+    ).reshape((-1, 1, 3))
+    centers = ((cells + basis) / NUM_CELLS).reshape((-1, 3))
+    radius = (vol_frac / (centers.shape[0] * 4 / 3 * math.pi)) ** (1 / 3)
+    # every sphere moves by less than half the gap to its closest neighbour
+    gap = 1 / (NUM_CELLS * math.sqrt(2)) - 2 * radius
+    direction = rng.standard_normal(centers.shape)
+    direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+    shift = 0.49 * gap * rng.uniform(size=(centers.shape[0], 1)) ** (1 / 3)
+    centers = np.mod(centers + shift * direction, 1.0)
+
+    return np.column_stack([centers, np.full(centers.shape[0], radius)])
+
+
+def load(generator_class: type, packing: np.ndarray) -> SphereParticles:
+    """generator holding a packing as its warm start, without generating
+
+    Parameters
+    ----------
+    generator_class : type
+        generator class
+    packing : np.ndarray
+        spheres [x, y, z, r], one row per sphere
+
+    Returns
+    -------
+    SphereParticles
+        generator with the packing in its fiber store and cell list
+    """
+    generator = generator_class(
+        length=1.0,
+        width=1.0,
+        height=1.0,
+        radius_mu=packing[0, 3],
+        radius_std=0.0,
+        # above the volume fraction of the packing, all spheres are kept
+        vol_req=0.9,
+        num_fiber_max=packing.shape[0],
+        num_cycle_max=1,
+        dist_min_factor=1.0,
+    )
+    generator.rng = np.random.default_rng(0)
+    generator._start_budget(time_budget=None, trial_budget=None)
+    generator._start_snapshots(None)
+    generator.initial_fibers = packing
+    generator._parameter_initialization()
+    generator._procedure_initialization()
+    return generator
+
+
+def overlap_checks(
+    generator: SphereParticles, trials: np.ndarray
+) -> Tuple[float, list]:
+    """time the overlap check of trial spheres
+
+    Parameters
+    ----------
+    generator : SphereParticles
+        generator holding the packing
+    trials : np.ndarray
+        trial spheres [x, y, z, r], one row per sphere
+
+    Returns
+    -------
+    Tuple[float, list]
+        time and overlap flags
+    """
+    start_time = time.perf_counter()
+    flags = [
+        generator._neighbour_overlap_check(trial.reshape((1, 4)))
+        for trial in trials
+    ]
+    return time.perf_counter() - start_time, flags
+
+
+def nearest_neighbours(generator: SphereParticles) -> Tuple[float, list]:
+    """time the nearest neighbour search of the stirring stage for every
+    sphere
+
+    Parameters
+    ----------
+    generator : SphereParticles
+        generator holding the packing
+
+    Returns
+    -------
+    Tuple[float, list]
+        time and slot ids of the nearest neighbours
+    """
+    start_time = time.perf_counter()
+    indices = [
+        generator._neighbour_min_dis_index(ii, cycle=0)[1]
+        for ii in range(len(generator.fiber_store))
+    ]
+    return time.perf_counter() - start_time, indices
+
+
+def main():
+    print(
+        f"{'vol_frac':>8} {'spheres':>8} {'query':>17} "
+        f"{'brute [s]':>10} {'cell list [s]':>14} {'speedup':>8}"
+    )
+    for vol_req in VOL_REQS:
+        packing = dense_packing(vol_req)
+        brute_force = load(BruteForceSphereParticles, packing)
+        cell_list = load(SphereParticles, packing)
+        assert len(cell_list.fiber_store) == packing.shape[0]
+        assert not any(
+            brute_force._neighbour_overlap_check(sphere.reshape((1, 4)), ii)
+            for ii, sphere in enumerate(packing)
+        ), "the packing overlaps"
+        rng = np.random.default_rng(1)
+        trials = np.column_stack(
+            [rng.uniform(size=(NUM_TRIALS, 3)), np.full(NUM_TRIALS, packing[0, 3])]
+        )
+        for query, function, args in [
+            ("overlap check", overlap_checks, (trials,)),
+            ("nearest neighbour", nearest_neighbours, ()),
+        ]:
+            time_brute_force, reference = function(brute_force, *args)
+            time_cell_list, result = function(cell_list, *args)
+            assert result == reference, f"{query} results differ"
+            print(
+                f"{cell_list.vol_frac:>8.3f} {len(cell_list.fiber_store):>8d} "
+                f"{query:>17} {time_brute_force:>10.2f} {time_cell_list:>14.2f} "
+                f"{time_brute_force / time_cell_list:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
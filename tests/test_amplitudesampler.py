@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from f3dasm_simulate.abaqus.amplitudesampler import AmplitudeGenerator
+
+
+@pytest.mark.parametrize("sampler", ["uniform", "gp"])
+def test_batches_agree_with_single_paths(sampler):
+    amplitude = AmplitudeGenerator(
+        num_control=5, num_steps=20, num_amplitude=9, seed=7, sampler=sampler
+    )
+    paths = amplitude.generate_paths()
+    assert paths.shape == (9, 21, 3)
+    assert np.all(paths[:, 0, :] == 0.0)
+    np.testing.assert_array_equal(amplitude.generate_paths(4, start=3), paths[3:7])
+    for index in range(9):
+        np.testing.assert_array_equal(amplitude.amplitude_path(index), paths[index])
+    assert np.all(np.isfinite(paths))
+    assert len(np.unique(paths[:, -1, 0])) == 9
+
+
+def test_uniform_control_values_in_range():
+    amplitude = AmplitudeGenerator(num_control=6, num_amplitude=1000, seed=0)
+    y_control = amplitude.sampler.control_values(amplitude, 0, 1000)
+    assert np.all(y_control[:, 0, :] == 0.0)
+    assert y_control[:, 1:, :].min() >= -1.0 and y_control[:, 1:, :].max() <= 1.0
+    assert abs(y_control[:, 1:, :].mean()) < 0.05
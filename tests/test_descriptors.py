@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from f3dasm_simulate.abaqus import descriptors
+
+
+def _packings(dim):
+    rng = np.random.default_rng(3)
+    return [
+        np.column_stack([rng.uniform(size=(num, dim)), np.full(num, 0.01)])
+        for num in (1, 40, 300, 25)
+    ]
+
+
+@pytest.mark.parametrize("dim", [2, 3])
+@pytest.mark.parametrize("tree", [True, False])
+def test_batch_descriptors_large_packing(monkeypatch, dim, tree):
+    # the packing of 300 fibers does not fit in a chunk of 5000 pair distances
+    if not tree:
+        monkeypatch.setattr(descriptors, "cKDTree", None)
+    elif descriptors.cKDTree is None:
+        pytest.skip("scipy is not available")
+    packings = _packings(dim)
+    box = np.ones(dim)
+    radii = np.array([0.2, 0.05, 0.1])
+    bins = np.linspace(0.0, 0.2, 11)
+    reference = descriptors.batch_descriptors(packings, box, radii, bins)
+    chunked = descriptors.batch_descriptors(
+        packings, box, radii, bins, chunk_size=5000
+    )
+    for key, value in reference.items():
+        np.testing.assert_allclose(chunked[key], value, rtol=1e-12, err_msg=key)
+    np.testing.assert_allclose(
+        chunked["ripley_k"][2], descriptors.ripley_k(packings[2][:, :dim], box, radii)
+    )
@@ -0,0 +1,36 @@
+import pytest
+
+from f3dasm_simulate.abaqus import microstructure
+from f3dasm_simulate.abaqus.microstructure_cache import MicrostructureCache
+
+
+@pytest.fixture
+def settings():
+    # seed 3 is rejected, seed 4 is the lowest accepted seed
+    return dict(vol_req=0.45, seed=3, vol_frac_tol=0.222, num_resample=3,
+                trial_budget=800)
+
+
+def test_parallel_generation_uses_lowest_accepted_seed(monkeypatch, settings):
+    monkeypatch.setattr(microstructure, "_available_cpus", lambda: 4)
+    serial = microstructure.CircleMicrostructure(**settings)
+    parallel = microstructure.CircleMicrostructure(n_workers=4, **settings)
+    assert serial.seed_used == parallel.seed_used == 4
+    assert serial.get_microstructure() == parallel.get_microstructure()
+    assert serial.microstructure_generator is not None
+    assert parallel.microstructure_generator is None
+    assert parallel.generation_result.num_fibers == (
+        serial.generation_result.num_fibers)
+
+
+def test_disk_cache_restores_seed_used(tmp_path, settings):
+    cache = MicrostructureCache(str(tmp_path))
+    generated = microstructure.CircleMicrostructure(disk_cache=cache, **settings)
+    loaded = microstructure.CircleMicrostructure(disk_cache=cache, **settings)
+    assert loaded.microstructure_generator is None
+    assert loaded.seed_used == generated.seed_used == 4
+    assert loaded.get_microstructure() == generated.get_microstructure()
+    other = microstructure.CircleMicrostructure(disk_cache=cache, n_workers=2,
+                                                **settings)
+    assert cache.key(other._disk_cache_parameters()) != cache.key(
+        generated._disk_cache_parameters())
@@ -0,0 +1,14 @@
+import numpy as np
+
+from f3dasm_simulate.abaqus.microstructure_cache import MicrostructureCache
+
+
+def test_overwrite_is_counted_once(tmp_path):
+    cache = MicrostructureCache(str(tmp_path))
+    cache.save("a", fiber_positions=np.zeros((4, 3)), info={"vol_frac": 0.1})
+    cache.save("b", fiber_positions=np.zeros((2, 3)), info={"vol_frac": 0.2})
+    cache.save("a", fiber_positions=np.zeros((8, 3)), info={"vol_frac": 0.3})
+    usage = cache._usage
+    cache.evict()
+    assert usage == cache._usage
+    assert cache._usage[1] == 2
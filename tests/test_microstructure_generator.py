@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from f3dasm_simulate.abaqus.circle_particles import CircleParticles
+from f3dasm_simulate.abaqus.sphere_particles import SphereParticles
+
+
+def _circles(vol_req=0.3):
+    return CircleParticles(length=0.048, width=0.048, radius_mu=0.003,
+                           radius_std=0.0, vol_req=vol_req)
+
+
+def _spheres():
+    return SphereParticles(length=1.0, width=1.0, height=1.0, radius_mu=0.1,
+                           radius_std=0.0, vol_req=0.1)
+
+
+@pytest.mark.parametrize("generator", [_circles, _spheres])
+@pytest.mark.parametrize("initial_fibers", [[], np.zeros((0, 3)), np.zeros((0, 5))])
+def test_empty_warm_start_is_rejected(generator, initial_fibers):
+    with pytest.raises(ValueError, match="at least one fiber"):
+        generator().generate_microstructure(seed=0, initial_fibers=initial_fibers)
+
+
+@pytest.mark.parametrize("initial_fibers", [np.zeros(3), np.zeros((2, 6)),
+                                            np.zeros((2, 2, 3))])
+def test_misshaped_warm_start_is_rejected(initial_fibers):
+    with pytest.raises(ValueError, match="columns"):
+        _circles().generate_microstructure(seed=0, initial_fibers=initial_fibers)
+
+
+def test_warm_start_reaches_vol_req():
+    cold = _circles()
+    cold.generate_microstructure(seed=1)
+    warm = _circles(vol_req=0.35)
+    warm.generate_microstructure(seed=2, initial_fibers=cold.fiber_positions)
+    assert warm.vol_frac >= 0.35
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from f3dasm_simulate.abaqus.phase_map import PhaseMap
+
+
+@pytest.mark.parametrize("run_length", [False, True])
+def test_write_read_roundtrip(tmp_path, run_length):
+    phase_map = (np.random.default_rng(0).uniform(size=(6, 5, 9)) > 0.5).astype(
+        np.uint8
+    )
+    file_name = str(tmp_path / "map.bin")
+    PhaseMap.write(file_name, phase_map, run_length=run_length)
+    assert np.array_equal(PhaseMap(file_name).to_array(), phase_map)
+
+
+@pytest.mark.parametrize("run_length", [False, True])
+@pytest.mark.parametrize("value", [2, 255, -1, 0.5])
+def test_write_rejects_non_binary_values(tmp_path, run_length, value):
+    phase_map = np.array([[0, 1, 1, 1], [1, 0, 0, 1]], dtype=float)
+    phase_map[0, 1] = value
+    with pytest.raises(ValueError):
+        PhaseMap.write(str(tmp_path / "map.bin"), phase_map, run_length=run_length)
+
+
+def test_write_rejects_run_of_twos(tmp_path):
+    # a run of 2s broke the parity of the run-length encoding
+    with pytest.raises(ValueError):
+        PhaseMap.write(
+            str(tmp_path / "map.bin"),
+            np.array([[0, 2, 1, 1], [1, 0, 0, 2]]),
+            run_length=True,
+        )